@@ -9,6 +9,7 @@ function ScheduleManagement() {
   const [selectedRoom, setSelectedRoom] = useState(null);
   const [loading, setLoading] = useState(false);
   const [scheduleGenerated, setScheduleGenerated] = useState(false);
+  const [generationPhase, setGenerationPhase] = useState(null);
   
   // Days for the schedule
   const days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday'];
@@ -23,7 +24,23 @@ function ScheduleManagement() {
     setLoading(true);
     
     try {
-      const response = await fetch('http://localhost:8080/api/v1/schedule/generate');
+      let response = await fetch('http://localhost:8080/api/v1/schedule/generate');
+      // Long runs come back as 202 with a job: poll it, then fetch its result
+      if (response.status === 202) {
+        const job = await response.json();
+        let status = job.status;
+        while (status === 'queued' || status === 'running') {
+          await new Promise(resolve => setTimeout(resolve, 2000));
+          const statusResponse = await fetch(`http://localhost:8080/api/v1/schedule/jobs/${job.job_id}`);
+          if (!statusResponse.ok) {
+            throw new Error('Failed to check schedule generation');
+          }
+          const jobStatus = await statusResponse.json();
+          status = jobStatus.status;
+          setGenerationPhase(jobStatus.phase);
+        }
+        response = await fetch(`http://localhost:8080/api/v1/schedule/jobs/${job.job_id}/result`);
+      }
       if (!response.ok) {
         throw new Error('Failed to generate schedule');
       }
@@ -36,6 +53,7 @@ function ScheduleManagement() {
       alert('Failed to generate schedule. Check console for details.');
     } finally {
       setLoading(false);
+      setGenerationPhase(null);
     }
   };
   
@@ -73,6 +91,7 @@ function ScheduleManagement() {
         <div className="loading-container">
           <div className="spinner"></div>
           <h2>Loading schedule data...</h2>
+          {generationPhase && <p>Current step: {generationPhase}</p>}
         </div>
       </div>
     );
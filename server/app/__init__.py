@@ -4,12 +4,13 @@ from mongoengine import connect,disconnect
 from dotenv import load_dotenv
 from .routes import blueprints
 from flask_cors import CORS
+from .utils.stats import mongo_commands
 
 load_dotenv()  # Load .env variables
 
 def create_app():
     app = Flask(__name__)
-    CORS(app)
+    CORS(app, expose_headers=['X-Unplaced-Sessions', 'X-Scheduler-Stats', 'ETag', 'Location'])
     #CORS(app, origins=["http://localhost:5173"])
 
 
@@ -22,7 +23,8 @@ def create_app():
     disconnect()
     connect(
         db='university_scheduler',
-        host=os.getenv('MONGO_URI')
+        host=os.getenv('MONGO_URI'),
+        event_listeners=[mongo_commands]  # Lets scheduling runs report the Mongo commands they issue
     )
 
 
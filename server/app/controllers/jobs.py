@@ -0,0 +1,182 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from bson import ObjectId
+from mongoengine import connect, disconnect
+from mongoengine.errors import NotUniqueError
+from ..models import Job, Version
+from ..utils.reference_cache import DATA_VERSION
+from ..utils.stats import mongo_commands
+from .scheduler1 import SchedulerController
+from .timetables import ENROLMENT_VERSION
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Generation runs at a time in this process's pool; one keeps runs from competing for the CPU and the saves
+JOB_WORKERS = int(os.getenv('SCHEDULER_JOB_WORKERS', '1'))
+
+# The owning process refreshes its active jobs' heartbeat this often; a job silent for
+# STALE_SECONDS belongs to a process that died, and a duplicate submission replaces it
+HEARTBEAT_SECONDS = 10
+STALE_SECONDS = 60
+
+_owner = f"{socket.gethostname()}:{os.getpid()}:{ObjectId()}"
+_lock = threading.Lock()
+_pool = None
+_in_flight = set()  # Futures of the jobs this process's pool is running or holding
+_heartbeat = None
+
+
+def submit_schedule_job(params):
+    """Queue a schedule generation with the given SchedulerController arguments
+
+    A job already queued or running with the same arguments against the same data and
+    enrolment versions (see ENROLMENT_VERSION) is returned instead of starting another run.
+
+    Returns:
+        (job, created): the Job and whether this call submitted it
+    Raises:
+        ValueError: for arguments SchedulerController rejects
+    """
+    SchedulerController(**params)  # Validate here, in the request, rather than in the worker
+    data_version = Version.current(DATA_VERSION)
+    enrolment_version = Version.current(ENROLMENT_VERSION)
+    key = json.dumps({'data_version': data_version, 'enrolment_version': enrolment_version, **params},
+                     sort_keys=True)
+    _expire_abandoned(key)
+
+    job_id = ObjectId()
+    now = datetime.utcnow()
+    try:
+        job = Job.objects(active_key=key).modify(
+            upsert=True, new=True, set_on_insert__id=job_id, set_on_insert__params=params,
+            set_on_insert__data_version=data_version, set_on_insert__enrolment_version=enrolment_version,
+            set_on_insert__status='queued',
+            set_on_insert__owner=_owner, set_on_insert__submitted_at=now, set_on_insert__heartbeat=now)
+    except NotUniqueError:  # Another process inserted the same job between our lookup and insert
+        job = Job.objects(active_key=key).first()
+        if job is None:  # ... and it has already finished
+            return submit_schedule_job(params)
+
+    created = job.id == job_id
+    if created:
+        future = _executor().submit(_run_job, str(job_id))
+        with _lock:
+            _in_flight.add(future)
+        future.add_done_callback(lambda f: _job_finished(str(job_id), f))
+        _start_heartbeat()
+        logger.info(f"Submitted schedule job {job_id} with {params} on data version {data_version}, "
+                    f"enrolment version {enrolment_version}.")
+    else:
+        logger.info(f"Joined schedule job {job.id} ({job.status}) with {params}.")
+    return job, created
+
+
+def wait_for_job(job_id, timeout):
+    """Poll a job until it is done or failed, or timeout seconds pass, and return it
+
+    Request handlers keep timeout short: an HTTP worker waiting here serves nothing else.
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.2
+    while True:
+        job = Job.objects(id=job_id).first()
+        if job is None or job.status not in Job.ACTIVE:
+            return job
+        if time.monotonic() >= deadline:
+            return job
+        time.sleep(delay)
+        delay = min(delay * 1.5, 2.0)
+
+
+def _executor():
+    global _pool
+    with _lock:
+        if _pool is None:
+            context = multiprocessing.get_context('spawn')  # Never fork a process holding a Mongo client
+            _pool = ProcessPoolExecutor(max_workers=JOB_WORKERS, mp_context=context, initializer=_init_worker)
+        return _pool
+
+
+def _init_worker():
+    """Give each pool worker its own Mongo connection, as create_app() does for the web process"""
+    disconnect()
+    connect(db='university_scheduler', host=os.getenv('MONGO_URI'), event_listeners=[mongo_commands])
+
+
+def _run_job(job_id):
+    """Pool worker: run one generation and record its outcome on the job"""
+    job = Job.objects(id=job_id, status='queued').modify(
+        new=True, set__status='running', set__started_at=datetime.utcnow())
+    if job is None:  # Given up as abandoned while it waited in the queue
+        return
+
+    def progress(phase):
+        Job.objects(id=job_id).update_one(set__phase=phase)
+
+    try:
+        controller = SchedulerController(progress=progress, **job.params)
+        success = controller.generate_schedule()
+        result = {
+            'success': success,
+            'complete': success and not controller.unplaced,
+            'unplaced': controller.unplaced,
+            'reasons': controller.infeasibility,
+            'stats': controller.stats.to_dict(),
+            'version': controller.version,
+        }
+        _finish(job_id, set__status='done', set__result=result)
+    except Exception as e:
+        logger.exception(f"Schedule job {job_id} failed")
+        _finish(job_id, set__status='failed', set__error=str(e))
+
+
+def _job_finished(job_id, future):
+    """Web process: fail a job whose worker never recorded an outcome (e.g. the worker process died)"""
+    with _lock:
+        _in_flight.discard(future)
+    error = future.exception()
+    if error is not None:
+        logger.error(f"Schedule job {job_id} was lost: {error!r}")
+        _finish(job_id, only_active=True, set__status='failed', set__error=f"Worker failed: {error!r}")
+
+
+def _finish(job_id, only_active=False, **update):
+    query = Job.objects(id=job_id)
+    if only_active:
+        query = query.filter(status__in=Job.ACTIVE)
+    query.update_one(set__finished_at=datetime.utcnow(), unset__active_key=True, **update)
+
+
+def _expire_abandoned(key):
+    """Fail the active job for key if its owner has stopped sending heartbeats"""
+    Job.objects(active_key=key, heartbeat__lt=datetime.utcnow() - timedelta(seconds=STALE_SECONDS)).update_one(
+        set__status='failed', set__error='Abandoned: the process running it stopped',
+        set__finished_at=datetime.utcnow(), unset__active_key=True)
+
+
+def _start_heartbeat():
+    global _heartbeat
+    with _lock:
+        if _heartbeat is None:
+            _heartbeat = threading.Thread(target=_beat, name='schedule-job-heartbeat', daemon=True)
+            _heartbeat.start()
+
+
+def _beat():
+    """Refresh the heartbeat of this process's active jobs until it has none left"""
+    global _heartbeat
+    while True:
+        with _lock:
+            if not _in_flight:
+                _heartbeat = None
+                return
+        Job.objects(owner=_owner, status__in=Job.ACTIVE).update(set__heartbeat=datetime.utcnow())
+        time.sleep(HEARTBEAT_SECONDS)
@@ -1,8 +1,12 @@
 from .scheduler1 import SchedulerController
+from ..solver import compile_problem
 from ..models import Schedule, TimeSlot, Room, Course, Teacher, Student
+from ..utils.reference_cache import reference_data
 from mongoengine import connect
+import json
 import time
 import os
+import sys
 from dotenv import load_dotenv
 
 # Connect to MongoDB
@@ -35,14 +39,26 @@ def verify_constraints():
     
     # Check for student conflicts
     print("Checking for student conflicts...")
+    model = compile_problem()
+    # Course ids as stored, read raw: dereferencing a course deleted since the schedule was saved raises
+    stored_courses = {doc['_id']: doc['course'] for doc in Schedule.objects.only('course').as_pymongo()}
+    for schedule in all_schedules:
+        if model.course_index.get(stored_courses[schedule.id]) is None:
+            violations.append(f"- Unknown course: session {schedule.session_number} at {schedule.time_slot} "
+                              f"refers to course {stored_courses[schedule.id]}, which is not in the current data")
     for schedule1 in all_schedules:
         for schedule2 in all_schedules:
             if schedule1.id != schedule2.id and schedule1.time_slot.id == schedule2.time_slot.id:
-                # Get students enrolled in both courses
+                index1 = model.course_index.get(stored_courses[schedule1.id])
+                index2 = model.course_index.get(stored_courses[schedule2.id])
+                if index1 is None or index2 is None:  # Reported above
+                    continue
                 course1 = schedule1.course
                 course2 = schedule2.course
-                
-                # Find students enrolled in both courses
+
+                # Only look the students up when the conflict matrix says the courses share some
+                if not model.conflicts.conflicts(index1, index2):
+                    continue
                 students_in_both_courses = Student.objects(enrolled_courses__all=[course1, course2])
                 
                 if students_in_both_courses:
@@ -82,56 +98,65 @@ def verify_constraints():
     else:
         print("\nNo constraint violations found! The schedule is valid.")
 
+def _reference_lookups():
+    """Rooms, time slots and courses from the reference cache, each keyed by _id"""
+    return ({room['_id']: room for room in reference_data.rooms()},
+            {slot['_id']: slot for slot in reference_data.time_slots()},
+            {course['_id']: course for course in reference_data.courses()})
+
+
 def display_student_schedule(student_id):
-    """Return the schedule for a specific student in JSON format"""
-    try:
-        student = Student.objects.get(student_id=student_id)
-        
-        # Create a dictionary to store student info
-        schedule_data = {
-            "student_id": student.student_id,
-            "student_name": student.name,
-            "courses": []  # This will store the enrolled courses
-        }
-
-        # Get all courses the student is enrolled in
-        courses = student.enrolled_courses
-        schedule_data["courses"] = [course.course_code for course in courses]
-        
-        # Get schedules for these courses
-        schedules = []
-        for course in courses:
-            course_schedules = Schedule.objects(course=course)
-            schedules.extend(course_schedules)
-        
-        # Sort by day and time
-        days_order = {'Monday': 1, 'Tuesday': 2, 'Wednesday': 3, 'Thursday': 4, 'Friday': 5}
-        schedules.sort(key=lambda s: (days_order[s.time_slot.day], s.time_slot.start_time))
-        
-        # Organize by day
-        current_day = None
-        day_schedule = {}
-        for schedule in schedules:
-            if schedule.time_slot.day != current_day:
-                current_day = schedule.time_slot.day
-                day_schedule[current_day] = []
-            
-            day_schedule[current_day].append({
-                "start_time": schedule.time_slot.start_time.strftime('%H:%M'),
-                "end_time": schedule.time_slot.end_time.strftime('%H:%M'),
-                "course_code": schedule.course.course_code,
-                "session_number": schedule.session_number,
-                "room": schedule.room.room_id,
-                "teacher": schedule.teacher.name
-            })
-
-        # Adding the day-wise schedule to the response
-        schedule_data['schedule'] = day_schedule
-
-        return schedule_data
-        
-    except Student.DoesNotExist:
+    """Return the schedule for a specific student in JSON format
+
+    Reads the student, their sessions and their teachers in one query each; rooms,
+    time slots and courses come from the reference cache, read again if it lacks one
+    the student needs (written through another worker since the cache last checked).
+    """
+    student = Student.objects(student_id=student_id).only('student_id', 'name', 'enrolled_courses') \
+        .as_pymongo().first()
+    if student is None:
         return None
+    enrolled = student.get('enrolled_courses', [])
+    schedules = list(Schedule.objects(course__in=enrolled).as_pymongo())
+
+    rooms, slots, courses = _reference_lookups()
+    if (not set(enrolled) <= courses.keys()
+            or any(s['room'] not in rooms or s['time_slot'] not in slots for s in schedules)):
+        reference_data.refresh()
+        rooms, slots, courses = _reference_lookups()
+
+    # Create a dictionary to store student info, with the enrolled courses
+    schedule_data = {
+        "student_id": student['student_id'],
+        "student_name": student['name'],
+        "courses": [courses[course]['course_code'] for course in enrolled]
+    }
+
+    # Sort the schedules for these courses by day and time
+    teachers = {teacher['_id']: teacher['name'] for teacher in
+                Teacher.objects(id__in={s['teacher'] for s in schedules}).only('name').as_pymongo()}
+    days_order = {'Monday': 1, 'Tuesday': 2, 'Wednesday': 3, 'Thursday': 4, 'Friday': 5}
+    course_order = {course: i for i, course in reversed(list(enumerate(enrolled)))}
+    schedules.sort(key=lambda s: (days_order[slots[s['time_slot']]['day']], slots[s['time_slot']]['start_time'],
+                                  course_order[s['course']]))
+
+    # Organize by day
+    day_schedule = {}
+    for schedule in schedules:
+        slot = slots[schedule['time_slot']]
+        day_schedule.setdefault(slot['day'], []).append({
+            "start_time": slot['start_time'].strftime('%H:%M'),
+            "end_time": slot['end_time'].strftime('%H:%M'),
+            "course_code": courses[schedule['course']]['course_code'],
+            "session_number": schedule['session_number'],
+            "room": rooms[schedule['room']]['room_id'],
+            "teacher": teachers[schedule['teacher']]
+        })
+
+    # Adding the day-wise schedule to the response
+    schedule_data['schedule'] = day_schedule
+
+    return schedule_data
 
 
 
@@ -191,6 +216,44 @@ def display_by_day():
                     enrolled_count = Student.objects(enrolled_courses=schedule.course).count()
                     print(f"      Students: {enrolled_count}")
 
+# (backend, strategy, backjumping) runs compared by benchmark_backends
+BENCHMARK_RUNS = [
+    ('search', 'iterative', False),
+    ('search', 'dsatur', True),
+    ('search', 'two-phase', True),
+    ('cp-sat', 'iterative', False),
+]
+
+def benchmark_backends(time_budget=60):
+    """Time every backend on the same compiled problem, without touching the stored schedule"""
+    print(f"\n=== BACKEND BENCHMARK ({time_budget:g}s per run) ===\n")
+    model = compile_problem()
+    print(f"{'Backend':<10} {'Strategy':<12} {'Result':<10} {'Placed':<12} {'Nodes':<12} {'Seconds':<10}")
+    print("-" * 68)
+    for backend, strategy, backjumping in BENCHMARK_RUNS:
+        try:
+            scheduler = SchedulerController(strategy=strategy, backjumping=backjumping,
+                                            time_budget=time_budget, backend=backend)
+        except ValueError as e:
+            print(f"{backend:<10} {strategy:<12} skipped: {e}")
+            continue
+        start_time = time.time()
+        success = scheduler.solve_compiled(model)
+        elapsed = time.time() - start_time
+        if success:
+            result, placed = "solved", len(scheduler.schedule)
+        else:
+            result = "timeout" if elapsed >= time_budget else "failed"
+            placed = len(scheduler.partial)
+        print(f"{backend:<10} {strategy:<12} {result:<10} {f'{placed}/{model.num_sessions}':<12} "
+              f"{scheduler.stats.nodes:<12} {elapsed:<10.2f}")
+
+def report_stored_schedule():
+    """Print the room views of the schedule stored in the database, without regenerating it"""
+    scheduler = SchedulerController()
+    scheduler.load_schedule()
+    print(scheduler.report().render())
+
 def run_scheduler():
     """Run the scheduler and display the results"""
     print("Initializing scheduler...")
@@ -203,6 +266,10 @@ def run_scheduler():
     
     if success:
         print(f"\nSchedule generated successfully in {end_time - start_time:.2f} seconds!")
+        print(f"Run stats:\n{json.dumps(scheduler.stats.to_dict(), indent=2)}")
+
+        # Room views, rendered from the schedule in memory
+        print(scheduler.report().render())
         
         # Verify constraints are satisfied
         verify_constraints()
@@ -223,4 +290,9 @@ def run_scheduler():
         print("\nFailed to generate a valid schedule. The constraints may be too tight.")
 
 if __name__ == "__main__":
-    run_scheduler()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        benchmark_backends(float(sys.argv[2]) if len(sys.argv) > 2 else 60)
+    elif len(sys.argv) > 1 and sys.argv[1] == "--report":
+        report_stored_schedule()
+    else:
+        run_scheduler()
\ No newline at end of file
@@ -0,0 +1,88 @@
+class ScheduleReport:
+    """Console views of a schedule, built in memory from the compiled model
+
+    One pass over the schedule groups the placements by room and fills the
+    room x start time x day grid; the three views below only format that, so
+    rendering a report issues no database queries at all.
+    """
+
+    def __init__(self, model, schedule):
+        self.model = model
+        self.schedule = schedule  # session -> (time_slot index, room index)
+
+        # Placements of every room in chronological order (slots are numbered by day, then start time)
+        self.room_sessions = [[] for _ in range(model.num_rooms)]
+        # (room, start_time, day) -> label of the session held there
+        self.grid = {}
+        for session, (slot, room) in sorted(schedule.items(), key=lambda item: item[1]):
+            self.room_sessions[room].append((slot, session))
+            self.grid[(room, model.slot_start[slot], model.slot_day[slot])] = model.describe_session(session)
+
+        self.start_times = sorted(set(model.slot_start))
+
+    def render(self):
+        """All three views, as printed after a scheduling run"""
+        return "\n".join([self.by_room(), self.room_timetable(), self.room_summary()])
+
+    def by_room(self):
+        """Every room's sessions, day by day, with course, professor and class size"""
+        model = self.model
+        lines = ["\n=== SCHEDULE BY ROOM ===\n"]
+        for room in range(model.num_rooms):
+            lines.append(f"\n--- ROOM {model.room_codes[room]} (Capacity: {model.room_capacity[room]}) ---\n")
+            if not self.room_sessions[room]:
+                lines.append("  No classes scheduled in this room.")
+                continue
+
+            current_day = None
+            for slot, session in self.room_sessions[room]:
+                course = model.session_course[session]
+                day = model.DAYS[model.slot_day[slot]]
+                if day != current_day:
+                    current_day = day
+                    lines.append(f"  {current_day}:")
+                start_time = model.slot_start[slot].strftime("%H:%M")
+                end_time = model.slot_end[slot].strftime("%H:%M")
+                lines.append(f"    {start_time} - {end_time}: {model.course_codes[course]} "
+                             f"(Session {model.session_number[session]}/{model.course_hours[course]})")
+                lines.append(f"      Course: {model.course_names[course]}")
+                lines.append(f"      Professor: {model.teacher_names[model.session_teacher[session]]}")
+                lines.append(f"      Students: {model.course_enrollment(course)}")
+                lines.append("")
+        return "\n".join(lines)
+
+    def room_timetable(self):
+        """A compact start time x day grid per room"""
+        model = self.model
+        lines = ["\n=== ROOM TIMETABLE VIEW ===\n"]
+        for room in range(model.num_rooms):
+            lines.append(f"\nROOM {model.room_codes[room]} (Capacity: {model.room_capacity[room]})")
+            lines.append("-" * 100)
+            header = "Time        "
+            for day in model.DAYS:
+                header += f"| {day[:3]}                 "
+            lines.append(header)
+            lines.append("-" * 100)
+
+            for start_time in self.start_times:
+                row = f"{start_time.strftime('%H:%M')}       "
+                for day in range(len(model.DAYS)):
+                    label = self.grid.get((room, start_time, day))
+                    row += f"| {label} " if label else "|                      "
+                lines.append(row)
+            lines.append("-" * 100)
+        return "\n".join(lines)
+
+    def room_summary(self):
+        """Sessions per room and the share of time slots they fill"""
+        model = self.model
+        lines = ["\n=== ROOM UTILIZATION SUMMARY ===\n",
+                 f"{'Room ID':<10} {'Capacity':<10} {'Sessions':<10} {'Utilization':<15}",
+                 "-" * 45]
+        for room in range(model.num_rooms):
+            sessions = len(self.room_sessions[room])
+            utilization = sessions / model.num_slots * 100 if model.num_slots > 0 else 0
+            lines.append(f"{model.room_codes[room]:<10} {model.room_capacity[room]:<10} {sessions:<10} "
+                         f"{utilization:.2f}%")
+        lines.append("")
+        return "\n".join(lines)
@@ -1,150 +1,411 @@
-from ..models import Room, Teacher, Student, Course, TimeSlot, Schedule
+from ..models import (Room, Teacher, Student, Schedule, RoomTimetable, TeacherTimetable,
+                      StudentTimetable, Version)
 import logging
-from collections import defaultdict
+from ..solver import (compile_problem, OccupancyIndex, ForwardCheckingSearch, find_components,
+                      solve_components, solve_portfolio, LocalSearch, LargeNeighbourhoodSearch, relabel_sessions,
+                      repair_schedule, complete_partial, blocking_constraints, check_feasibility,
+                      CPSAT_AVAILABLE, CpSatSearch)
+from ..utils.stats import RunStats
+from .schedule_report import ScheduleReport
+from .timetables import build_timetables, timetable_etag, ENROLMENT_VERSION
+from bson import ObjectId
+import os
+import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class SchedulerController:
-    def __init__(self):
-        self.sessions_to_schedule = []  # List of (course, teacher, session_number) tuples
-        self.time_slots = {}  # Dictionary of available time slots
-        self.rooms = {}  # Dictionary of available rooms
-        self.schedule = {}  # Final schedule as a dictionary
+    # 'iterative' walks a fixed complexity order on an explicit stack; 'backtracking' is the same
+    # search done recursively; 'dsatur' picks the most constrained session next; 'two-phase'
+    # runs dsatur over time slots only and matches rooms per slot afterwards; 'portfolio' races
+    # differently seeded and configured searches in separate processes and keeps the first result
+    STRATEGIES = ('iterative', 'backtracking', 'dsatur', 'two-phase', 'portfolio')
+
+    # What places the sessions: 'search' is our own search run with the strategy above; 'cp-sat'
+    # hands the same hard constraints to OR-Tools' CP-SAT solver (optional dependency)
+    BACKENDS = ('search', 'cp-sat')
+
+    def __init__(self, strategy='iterative', backjumping=False, workers=None, time_budget=None, improve_budget=None,
+                 lns_budget=None, incremental=False, warm_start=False, backend='search', progress=None):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown scheduling strategy '{strategy}'. Choose from {', '.join(self.STRATEGIES)}.")
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown solver backend '{backend}'. Choose from {', '.join(self.BACKENDS)}.")
+        if backend == 'cp-sat' and not CPSAT_AVAILABLE:
+            raise ValueError("The 'cp-sat' backend needs OR-Tools, which is not installed.")
+        self.strategy = strategy
+        self.backend = backend
+        self.backjumping = backjumping  # Conflict-directed backjumping for the dsatur/two-phase searches
+        self.workers = workers  # Process count: >1 solves independent components in parallel; portfolio defaults to one per CPU
+        self.time_budget = time_budget  # Seconds the search may run; past it the best partial schedule is kept
+        self.deadline = None  # time.monotonic() value the time budget runs out at
+        self.partial = {}  # Largest consistent partial assignment the search reached
+        self.unplaced = []  # Blocking-constraint report for each session a partial schedule leaves out
+        self.infeasibility = []  # Reasons found before solving that no complete schedule exists
+        self.improve_budget = improve_budget  # Seconds of local search for a better schedule once one is found
+        self.lns_budget = lns_budget  # Seconds of large neighbourhood search, run before the local search
+        self.incremental = incremental  # Repair the stored schedule instead of rebuilding it
+        self.warm_start = warm_start  # Try each session's stored placement first when rebuilding
+        self.progress = progress  # Called with each phase name as a run enters it (background jobs report it)
+        self.previous = {}  # Stored placements: session index -> (time_slot index, room index)
+        self.model = None  # Compiled, integer-indexed problem (see app.solver.model)
+        self.sessions_to_schedule = []  # List of session indices into the model
+        self.schedule = {}  # Final schedule: session index -> (time_slot index, room index)
+        self.occupancy = None  # O(1) lookups of what self.schedule already occupies
+        self.stats = RunStats()  # Counters and phase timings of the last run (see app.utils.stats)
+        self.version = None  # Schedule version the last saved schedule and its timetables carry
+        self.enrolment_version = None  # 'enrolment' Version read before the model was compiled
         self.MAX_SESSIONS_PER_TEACHER_PER_DAY = 5  # Maximum number of sessions a teacher can teach per day
 
     def initialize_data(self):
-        """Load data from the database and prepare for scheduling"""
-        # Load rooms
-        for room in Room.objects:
-            self.rooms[room.id] = room
-            
-        # Load time slots
-        for slot in TimeSlot.objects.filter(is_break=False):
-            self.time_slots[slot.id] = slot
-            
-        # Create nodes for each course's sessions
-        for course in Course.objects:
-            # Find teachers qualified to teach this course
-            qualified_teachers = Teacher.objects(teachable_courses=course)
-            if not qualified_teachers:
-                logger.warning(f"No qualified teacher found for {course.course_code}. Skipping.")
-                continue
-                
-            # For simplicity, assign the first qualified teacher to all sessions
-            # In a more advanced implementation, we could distribute among multiple teachers
-            teacher = qualified_teachers.first()
-            
-            # Create a session for each lecture hour
-            for session_num in range(1, course.lecture_hours + 1):
-                self.sessions_to_schedule.append((course, teacher, session_num))
-                
-        logger.info(f"Loaded {len(self.rooms)} rooms, {len(self.time_slots)} time slots, "
+        """Load data from the database once and compile it for scheduling"""
+        self.enrolment_version = Version.current(ENROLMENT_VERSION)
+        self.model = compile_problem()
+        self.sessions_to_schedule = list(range(self.model.num_sessions))
+        self.schedule = {}
+        self.occupancy = OccupancyIndex(self.model, self.MAX_SESSIONS_PER_TEACHER_PER_DAY)
+
+        logger.info(f"Loaded {self.model.num_rooms} rooms, {self.model.num_slots} time slots, "
                   f"and {len(self.sessions_to_schedule)} sessions to schedule.")
 
     def generate_schedule(self):
         """Main method to generate the class schedule using graph coloring with backtracking"""
-        self.initialize_data()
-        
-        # Clear any existing schedule
-        Schedule.objects.delete()
-        
-        # Sort sessions by complexity (number of constraints)
-        # Sessions with more constraints should be scheduled first
-        self.sessions_to_schedule.sort(key=self._calculate_session_complexity, reverse=True)
-        
-        # Start the backtracking algorithm
-        success = self._backtrack_schedule(0)
-        
+        self.stats = RunStats(on_phase=self.progress)
+        try:
+            return self._generate()
+        finally:
+            self.stats.finish()
+            logger.info(f"Run stats: {self.stats.to_json()}")
+
+    def _generate(self):
+        """generate_schedule() itself, with every phase timed in self.stats"""
+        stats = self.stats
+        with stats.phase('initialize_data'):
+            self.initialize_data()
+
+        # Reject provably impossible instances before searching; with a time budget keep the best partial schedule
+        with stats.phase('feasibility'):
+            self.infeasibility = check_feasibility(self.model, self.MAX_SESSIONS_PER_TEACHER_PER_DAY)
+        if self.infeasibility and (self.time_budget is None or self.incremental):
+            logger.error(f"Schedule is infeasible ({len(self.infeasibility)} problems found before solving).")
+            return False
+
+        if self.incremental:
+            # Keep the stored schedule and only move what no longer fits
+            with stats.phase('repair'):
+                success = self._repair_schedule()
+        else:
+            if self.warm_start:
+                with stats.phase('load_previous'):
+                    self.previous = self._load_stored_schedule()[0]
+
+            # The stored schedule stays readable until the new one replaces it in _save_schedule_to_db
+            if self.time_budget is not None:
+                self.deadline = time.monotonic() + self.time_budget
+            success = not self.infeasibility and self._solve()
+            if not success and self.deadline is not None:
+                # Out of time (or infeasible): settle for the largest schedule that can be made
+                with stats.phase('partial'):
+                    success = self._partial_schedule()
+            if success and self.warm_start:
+                reused = sum(1 for s, placement in self.schedule.items() if self.previous.get(s) == placement)
+                stats.warm_start = {'reused': reused, 'stored': len(self.previous)}
+                logger.info(f"Warm start reused {reused} of {len(self.previous)} stored placements.")
+
         if success:
             logger.info("Successfully created a schedule!")
-            # Save the schedule to the database
-            self._save_schedule_to_db()
-            
-            # Display the schedule organized by rooms
-            logger.info("Displaying schedule by room:")
-            self.display_schedule_by_room()
-            
-            # Display a compact timetable view
-            logger.info("Displaying room timetable view:")
-            self.display_room_timetable()
-            
-            # Print room utilization summary
-            self.print_room_schedule_summary()
-            
+            if not self.incremental:
+                if self.lns_budget:
+                    with stats.phase('lns'):
+                        self._lns_schedule()
+                if self.improve_budget:
+                    with stats.phase('improve'):
+                        self._improve_schedule()
+
+                # Save the schedule to the database
+                with stats.phase('save'):
+                    self._save_schedule_to_db()
+
+            # Per-room, teacher and student views for the read endpoints
+            with stats.phase('timetables'):
+                self._save_timetables()
+
+            # Console views are rendered on demand from report(), not on every run
             return True
         else:
             logger.error("Failed to create a schedule with the given constraints.")
             return False
 
+    def load_schedule(self):
+        """Compile the current data and load the stored schedule into self.schedule, without solving"""
+        self.initialize_data()
+        self.schedule = self._load_stored_schedule()[0]
+        return self.schedule
+
+    def report(self):
+        """Console views of self.schedule (see app.controllers.schedule_report)"""
+        return ScheduleReport(self.model, self.schedule)
+
+    def solve_compiled(self, model):
+        """Solve an already compiled problem in memory only, e.g. to compare backends on the same data"""
+        self.model = model
+        self.sessions_to_schedule = list(range(model.num_sessions))
+        self.schedule = {}
+        self.partial = {}
+        self.occupancy = OccupancyIndex(model, self.MAX_SESSIONS_PER_TEACHER_PER_DAY)
+        if self.time_budget is not None:
+            self.deadline = time.monotonic() + self.time_budget
+        return self._solve()
+
+    def _solve(self):
+        """Run the configured backend and strategy on the compiled problem"""
+        if self.backend == 'cp-sat':
+            with self.stats.phase('search'):
+                return self._run_engine(CpSatSearch(self.model, self.occupancy, self.sessions_to_schedule,
+                                                    preferred=self.previous, deadline=self.deadline,
+                                                    workers=self.workers))
+
+        if self.strategy not in ('dsatur', 'two-phase'):
+            # Sort sessions by complexity (number of constraints)
+            # Sessions with more constraints should be scheduled first
+            with self.stats.phase('sort'):
+                self.sessions_to_schedule.sort(key=self._calculate_session_complexity, reverse=True)
+
+        with self.stats.phase('search'):
+            return self._search()
+
+    def _search(self):
+        """Dispatch to the search the strategy and worker count call for"""
+        if self.strategy == 'portfolio':
+            success = self._portfolio_schedule()
+        elif (self.workers or 1) > 1:
+            success = self._parallel_schedule()
+        elif self.strategy in ('dsatur', 'two-phase'):
+            success = self._forward_checking_schedule()
+        else:
+            # Start the backtracking algorithm
+            if self.strategy == 'iterative':
+                success = self._forward_checking_schedule()
+            else:
+                success = self._backtrack_schedule(0)
+        return success
+
     def _backtrack_schedule(self, index):
         """Recursive backtracking algorithm for scheduling"""
         # Base case: if all sessions are scheduled, we're done
         if index >= len(self.sessions_to_schedule):
             return True
+        self.stats.max_depth = max(self.stats.max_depth, index)
             
-        course, teacher, session_num = self.sessions_to_schedule[index]
+        if self.deadline is not None:
+            if index > len(self.partial):
+                self.partial = dict(self.schedule)
+            if time.monotonic() >= self.deadline:
+                return False
+
+        session = self.sessions_to_schedule[index]
         
         # Try each time slot and room combination
-        for time_slot_id, time_slot in self.time_slots.items():
-            for room_id, room in self.rooms.items():
+        for time_slot, room in self._candidate_placements(session):
                 
-                # Check if this assignment is valid
-                if self._is_valid_assignment(course, teacher, session_num, time_slot, room):
-                    
-                    # Make a tentative assignment
-                    self.schedule[(course.id, session_num)] = (time_slot_id, room_id, teacher.id)
+            # Check if this assignment is valid
+            if self._is_valid_assignment(session, time_slot, room):
+                
+                # Make a tentative assignment
+                self.schedule[session] = (time_slot, room)
+                self.occupancy.assign(session, time_slot, room)
+                self.stats.nodes += 1
+                
+                # Recursively try to schedule the rest
+                if self._backtrack_schedule(index + 1):
+                    return True
                     
-                    # Recursively try to schedule the rest
-                    if self._backtrack_schedule(index + 1):
-                        return True
-                        
-                    # If we get here, we need to backtrack
-                    del self.schedule[(course.id, session_num)]
+                # If we get here, we need to backtrack
+                self.occupancy.unassign(session, time_slot, room)
+                del self.schedule[session]
+                self.stats.backtracks += 1
+
+                # Out of time: unwind without trying anything else
+                if self.deadline is not None and time.monotonic() >= self.deadline:
+                    return False
                     
         # If no valid assignment was found, return failure
         return False
 
-    def _is_valid_assignment(self, course, teacher, session_num, time_slot, room):
+    def _candidate_placements(self, session):
+        """Every (time_slot, room) in index order, with the session's stored placement first"""
+        preferred = self.previous.get(session)
+        if preferred is not None:
+            yield preferred
+        for time_slot in range(self.model.num_slots):
+            for room in range(self.model.num_rooms):
+                if (time_slot, room) != preferred:
+                    yield time_slot, room
+
+    def _forward_checking_schedule(self):
+        """Search with live slot domains on an explicit stack (see app.solver.search)"""
+        search = ForwardCheckingSearch(self.model, self.occupancy, self.sessions_to_schedule,
+                                       defer_rooms=self.strategy == 'two-phase',
+                                       backjumping=self.backjumping,
+                                       static_order=self.strategy == 'iterative',
+                                       preferred=self.previous,
+                                       deadline=self.deadline)
+        return self._run_engine(search)
+
+    def _run_engine(self, engine):
+        """Solve with a ForwardCheckingSearch or CpSatSearch and keep its schedule or best partial one"""
+        success = engine.solve()
+        self.stats.add_search(engine)
+        if success:
+            self.schedule = engine.assignment
+        elif len(engine.best_partial) > len(self.partial):
+            self.partial = engine.best_partial
+        return success
+
+    def _parallel_schedule(self):
+        """Solve the independent parts of the problem in a process pool (see app.solver.decompose)"""
+        components = find_components(self.model, self.sessions_to_schedule)
+        logger.info(f"Split {len(self.sessions_to_schedule)} sessions into {len(components)} independent components.")
+        if len(components) > 1:
+            schedule, searches = solve_components(self.model, self.occupancy, components, self.workers,
+                                                  backjumping=self.backjumping,
+                                                  static_order=self.strategy in ('iterative', 'backtracking'),
+                                                  preferred=self.previous, deadline=self.deadline)
+            for counters in searches:
+                self.stats.add_search(counters)
+            if schedule is not None:
+                self.schedule = schedule
+                return True
+            # Merging can fail where a single global search would not; start over in one process
+            logger.info("Parallel solve failed; falling back to a single search.")
+            self.occupancy = OccupancyIndex(self.model, self.MAX_SESSIONS_PER_TEACHER_PER_DAY)
+        return self._forward_checking_schedule()
+
+    def _portfolio_schedule(self):
+        """Race several search configurations in parallel (see app.solver.portfolio)"""
+        workers = self.workers or os.cpu_count() or 1
+        schedule, winner = solve_portfolio(self.model, self.occupancy, self.sessions_to_schedule, workers,
+                                           time_budget=self.time_budget, preferred=self.previous)
+        if schedule is None:
+            return False
+        # The stats describe the search that produced the schedule; the losers' work is discarded
+        index, config, counters = winner
+        self.stats.add_search(counters)
+        self.stats.portfolio = {'winner': index, 'config': config}
+        self.schedule = schedule
+        return True
+
+    def _partial_schedule(self):
+        """Keep the largest consistent schedule found and explain every session left out"""
+        self.occupancy = OccupancyIndex(self.model, self.MAX_SESSIONS_PER_TEACHER_PER_DAY)
+        self.schedule, unplaced = complete_partial(self.model, self.occupancy, self.partial,
+                                                   self.sessions_to_schedule)
+        self.unplaced = [blocking_constraints(self.model, self.occupancy, self.schedule, session)
+                         for session in unplaced]
+        for report in self.unplaced:
+            logger.warning(f"Could not place {report['course_code']} ({report['session_number']}): "
+                           f"{report['blocked_slots']}")
+        return True
+
+    def _lns_schedule(self):
+        """Re-solve small regions of the schedule exactly, in parallel by day (see app.solver.lns)"""
+        search = LargeNeighbourhoodSearch(self.model, self.occupancy, self.schedule,
+                                          workers=self.workers or os.cpu_count() or 1)
+        schedule = search.improve(self.lns_budget)
+        self.schedule = relabel_sessions(self.model, schedule)
+
+    def _improve_schedule(self):
+        """Lower the soft-constraint cost of the schedule by local search (see app.solver.improve)"""
+        search = LocalSearch(self.model, self.occupancy, self.schedule)
+        schedule = search.improve(self.improve_budget)
+        self.schedule = relabel_sessions(self.model, schedule)
+
+    def _repair_schedule(self):
+        """Repair the stored schedule with as few moves as possible and write back only what changed"""
+        model = self.model
+        previous, documents, stale, stale_teacher = self._load_stored_schedule()
+
+        result = repair_schedule(model, self.occupancy, previous, backjumping=self.backjumping)
+        if result is None:
+            return False
+        self.schedule, moved = result
+        changed = moved | stale_teacher
+
+        # Rewrite changed sessions as delete + insert, so a swap never trips the unique indexes
+        removed = stale + [documents[s] for s in changed if s in documents]
+        if removed:
+            Schedule.objects(id__in=removed).delete()
+        if changed:
+            Schedule.objects.insert([
+                Schedule(course=model.course_ids[model.session_course[s]],
+                         teacher=model.teacher_ids[model.session_teacher[s]],
+                         session_number=model.session_number[s],
+                         room=model.room_ids[self.schedule[s][1]],
+                         time_slot=model.slot_ids[self.schedule[s][0]])
+                for s in changed
+            ], load_bulk=False)
+        logger.info(f"Incremental repair rewrote {len(changed)} sessions and removed {len(stale)} obsolete "
+                    f"documents; {len(self.schedule) - len(changed)} sessions were left untouched.")
+        return True
+
+    def _load_stored_schedule(self):
+        """Map the stored Schedule documents onto sessions of the compiled model
+
+        Returns:
+            (placements, documents, stale, stale_teacher): session -> (time_slot, room) for
+            placements whose slot and room still exist, session -> document id, ids of documents
+            for sessions that no longer exist, and sessions stored with a different teacher
+        """
+        model = self.model
+        session_of = {(model.session_course[s], model.session_number[s]): s for s in range(model.num_sessions)}
+        placements = {}
+        documents = {}
+        stale = []
+        stale_teacher = set()
+        for doc in Schedule.objects.as_pymongo():
+            session = session_of.get((model.course_index.get(doc['course']), doc['session_number']))
+            if session is None or session in documents:
+                stale.append(doc['_id'])
+                continue
+            documents[session] = doc['_id']
+            if doc['teacher'] != model.teacher_ids[model.session_teacher[session]]:
+                stale_teacher.add(session)
+            slot = model.slot_index.get(doc['time_slot'])
+            room = model.room_index.get(doc['room'])
+            if slot is not None and room is not None:
+                placements[session] = (slot, room)
+        return placements, documents, stale, stale_teacher
+
+    def _is_valid_assignment(self, session, time_slot, room):
         """Check if a course session can be assigned to a time slot and room"""
-        # Get students enrolled in this course
-        enrolled_students = Student.objects(enrolled_courses=course)
+        model = self.model
+        occupancy = self.occupancy
+        course = model.session_course[session]
+        teacher = model.session_teacher[session]
+        
+        stats = self.stats
         
         # Check if room capacity is sufficient
-        if room.capacity < enrolled_students.count():
+        if not stats.check('capacity', model.room_fits(course, room)):
             return False
             
-        # Check for conflicts with already scheduled sessions
-        for (c_id, s_num), (ts_id, r_id, t_id) in self.schedule.items():
-            # Skip if we're checking the same session
-            if c_id == course.id and s_num == session_num:
-                continue
-                
-            scheduled_course = Course.objects.get(id=c_id)
-            scheduled_time_slot = TimeSlot.objects.get(id=ts_id)
+        # Check for conflicts with already scheduled sessions in this time slot:
+        
+        # 1. Same room conflict
+        if not stats.check('room', occupancy.room_free(time_slot, room)):
+            return False
             
-            # If different time slot, no conflict
-            if ts_id != time_slot.id:
-                continue
-                
-            # Same time slot - check for conflicts:
+        # 2. Teacher conflict: same teacher can't teach two courses at once
+        if not stats.check('teacher', occupancy.teacher_free(time_slot, teacher)):
+            return False
             
-            # 1. Same room conflict
-            if r_id == room.id:
-                return False
-                
-            # 2. Teacher conflict: same teacher can't teach two courses at once
-            if t_id == teacher.id:
-                return False
-                
-            # 3. Student conflict: check if any student is enrolled in both courses
-            # First approach: query students enrolled in both courses
-            student_conflicts = Student.objects(enrolled_courses__all=[course, scheduled_course])
-            if student_conflicts.count() > 0:
-                return False
+        # 3. Student conflict: no course already in this slot shares a student with this one
+        if not stats.check('students', occupancy.students_free(time_slot, course)):
+            return False
         
         # 4. Check teacher daily session limit
-        if not self._check_teacher_daily_limit(teacher, time_slot):
+        if not stats.check('daily_limit', self._check_teacher_daily_limit(teacher, time_slot)):
             return False
             
         # All checks passed, this is a valid assignment
@@ -152,46 +413,93 @@ class SchedulerController:
 
     def _check_teacher_daily_limit(self, teacher, new_time_slot):
         """Check if adding a new session would exceed the teacher's daily limit"""
-        # Count how many sessions the teacher is already teaching on this day
-        session_count = 0
-        for (_, _), (ts_id, _, t_id) in self.schedule.items():
-            if t_id == teacher.id:
-                time_slot = TimeSlot.objects.get(id=ts_id)
-                if time_slot.day == new_time_slot.day:
-                    session_count += 1
-                    
-        # Check if adding one more would exceed the limit
-        return session_count < self.MAX_SESSIONS_PER_TEACHER_PER_DAY
+        return self.occupancy.under_daily_limit(teacher, self.model.slot_day[new_time_slot])
 
-    def _calculate_session_complexity(self, session_tuple):
+    def _calculate_session_complexity(self, session):
         """Calculate how constrained a session is (higher = more constrained)"""
-        course, teacher, _ = session_tuple
+        model = self.model
+        course = model.session_course[session]
+        teacher = model.session_teacher[session]
         
         # More enrolled students = more potential conflicts
-        complexity = Student.objects(enrolled_courses=course).count()
+        complexity = model.course_enrollment(course)
         
         # More teachable courses by this teacher = more flexibility (less constrained)
-        if len(teacher.teachable_courses) > 0:
-            complexity += 10 / len(teacher.teachable_courses)
+        if model.teacher_course_count[teacher] > 0:
+            complexity += 10 / model.teacher_course_count[teacher]
         else:
             complexity += 10  # High complexity if teacher can only teach this course
         
         return complexity
 
     def _save_schedule_to_db(self):
-        """Save the generated schedule to the database"""
-        for (course_id, session_num), (time_slot_id, room_id, teacher_id) in self.schedule.items():
-            schedule = Schedule(
-                course=Course.objects.get(id=course_id),
-                teacher=Teacher.objects.get(id=teacher_id),
-                session_number=session_num,
-                room=Room.objects.get(id=room_id),
-                time_slot=TimeSlot.objects.get(id=time_slot_id)
-            )
-            schedule.save()
-            
+        """Replace the stored schedule with self.schedule in one atomic step
+
+        The documents are built from the ids already in the compiled model and swapped
+        in through a staging collection (see _replace_collection). Readers see either
+        the old or the new schedule in full, never a half-written or empty one.
+        """
+        model = self.model
+        documents = [{
+            'course': model.course_ids[model.session_course[session]],
+            'teacher': model.teacher_ids[model.session_teacher[session]],
+            'session_number': model.session_number[session],
+            'room': model.room_ids[room],
+            'time_slot': model.slot_ids[time_slot],
+        } for session, (time_slot, room) in self.schedule.items()]
+
+        self._replace_collection(Schedule, documents)
         logger.info(f"Saved {len(self.schedule)} scheduled sessions to the database.")
 
+    def _save_timetables(self):
+        """Replace the materialised room, teacher and student timetables with views of self.schedule"""
+        self.version = Version.bump('schedule')
+        rooms, teachers, students = build_timetables(self.model, self.schedule)
+        for document, key, timetables in ((RoomTimetable, 'room_id', rooms),
+                                          (TeacherTimetable, 'teacher_id', teachers)):
+            self._replace_collection(document, [{key: code, 'version': self.version, 'timetable': timetable}
+                                                for code, timetable in timetables.items()])
+        self._replace_collection(StudentTimetable, [{'student_id': code, 'version': self.version,
+                                                     'enrolment_version': self.enrolment_version,
+                                                     'timetable': timetable, 'etag': timetable_etag(timetable)}
+                                                    for code, timetable in students.items()])
+        self._drop_stale_student_timetables()
+        logger.info(f"Saved schedule version {self.version} timetables for {len(rooms)} rooms, "
+                    f"{len(teachers)} teachers and {len(students)} students.")
+
+    def _drop_stale_student_timetables(self):
+        """Delete the student timetables just saved for students who changed enrolment since compiling
+
+        They list the courses the model was compiled with, and the swap has replaced any
+        timetable the enrolment route rebuilt meanwhile. Without one, the next view builds
+        it from the stored schedule. Timetables saved after the swap carry a newer
+        enrolment version and are kept.
+        """
+        changed = Student.objects(enrolment_version__gt=self.enrolment_version).distinct('student_id')
+        if changed:
+            dropped = StudentTimetable.objects(student_id__in=changed,
+                                               enrolment_version__lte=self.enrolment_version).delete()
+            logger.info(f"Dropped {dropped} student timetables built before their enrolment changed.")
+
+    def _replace_collection(self, document, documents):
+        """Swap a whole collection for new documents in one atomic step
+
+        The documents are bulk inserted into a staging collection carrying the
+        document's indexes, which is then renamed over the live collection.
+        """
+        live = document._get_collection()
+        staging = live.database[f"{live.name}_staging_{ObjectId()}"]
+        try:
+            # Creating the indexes also creates the collection, so an empty one can be swapped in too
+            for spec in document._meta['index_specs']:
+                staging.create_index(spec['fields'], **{k: v for k, v in spec.items() if k != 'fields'})
+            if documents:
+                staging.insert_many(documents, ordered=False)
+            staging.rename(live.name, dropTarget=True)
+        except Exception:
+            staging.drop()
+            raise
+
     def get_schedule_by_teacher(self, teacher_id):
         """Get all scheduled sessions for a specific teacher"""
         teacher = Teacher.objects.get(teacher_id=teacher_id)
@@ -215,150 +523,3 @@ class SchedulerController:
         """Get all scheduled sessions for a specific room"""
         room = Room.objects.get(room_id=room_id)
         return Schedule.objects(room=room).order_by('time_slot.day', 'time_slot.start_time')
-
-    def display_schedule_by_room(self):
-        """Display the schedule organized by rooms"""
-        print("\n=== SCHEDULE BY ROOM ===\n")
-        
-        # Get all rooms
-        rooms = Room.objects.all()
-        
-        for room in rooms:
-            print(f"\n--- ROOM {room.room_id} (Capacity: {room.capacity}) ---\n")
-            
-            # Get all schedules for this room
-            schedules = Schedule.objects(room=room).order_by('time_slot.day', 'time_slot.start_time')
-            
-            if not schedules:
-                print("  No classes scheduled in this room.")
-                continue
-            
-            # Organize by day
-            current_day = None
-            
-            for schedule in schedules:
-                # Print day header if day changes
-                if schedule.time_slot.day != current_day:
-                    current_day = schedule.time_slot.day
-                    print(f"  {current_day}:")
-                
-                # Display time slot, course, and professor info
-                start_time = schedule.time_slot.start_time.strftime("%H:%M")
-                end_time = schedule.time_slot.end_time.strftime("%H:%M")
-                course_code = schedule.course.course_code
-                course_name = schedule.course.name
-                professor = schedule.teacher.name
-                session_num = schedule.session_number
-                total_sessions = schedule.course.lecture_hours
-                
-                # Count enrolled students
-                enrolled_count = Student.objects(enrolled_courses=schedule.course).count()
-                
-                print(f"    {start_time} - {end_time}: {course_code} (Session {session_num}/{total_sessions})")
-                print(f"      Course: {course_name}")
-                print(f"      Professor: {professor}")
-                print(f"      Students: {enrolled_count}")
-                print()
-
-    def display_room_timetable(self):
-        """Display a compact timetable view of all rooms' schedules"""
-        print("\n=== ROOM TIMETABLE VIEW ===\n")
-        
-        # Get all days and time slots
-        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-        time_slots = TimeSlot.objects(is_break=False).order_by('start_time').distinct('start_time')
-        
-        # Get all rooms
-        rooms = Room.objects.all()
-        
-        for room in rooms:
-            print(f"\nROOM {room.room_id} (Capacity: {room.capacity})")
-            print("-" * 100)
-            
-            # Print header row with days
-            header = "Time        "
-            for day in days:
-                header += f"| {day[:3]}                 "
-            print(header)
-            print("-" * 100)
-            
-            # For each time slot, print what's scheduled in this room
-            for time_slot_start in time_slots:
-                row = f"{time_slot_start.strftime('%H:%M')}       "
-                
-                for day in days:
-                    # Find if there's a class at this time/day in this room
-                    matching_slots = TimeSlot.objects(day=day, start_time=time_slot_start, is_break=False)
-                    
-                    if not matching_slots:
-                        row += "|                      "
-                        continue
-                    
-                    found_class = False
-                    for slot in matching_slots:
-                        schedule = Schedule.objects(room=room, time_slot=slot).first()
-                        if schedule:
-                            row += f"| {schedule.course.course_code} ({schedule.session_number}) "
-                            found_class = True
-                            break
-                    
-                    if not found_class:
-                        row += "|                      "
-                
-                print(row)
-            
-            print("-" * 100)
-
-    def print_room_schedule_summary(self):
-        """Print a summary of all room utilization"""
-        print("\n=== ROOM UTILIZATION SUMMARY ===\n")
-        
-        rooms = Room.objects.all()
-        total_time_slots = TimeSlot.objects(is_break=False).count()
-        
-        print(f"{'Room ID':<10} {'Capacity':<10} {'Sessions':<10} {'Utilization':<15}")
-        print("-" * 45)
-        
-        for room in rooms:
-            # Count sessions scheduled in this room
-            scheduled_sessions = Schedule.objects(room=room).count()
-            
-            # Calculate utilization percentage
-            utilization = (scheduled_sessions / total_time_slots) * 100 if total_time_slots > 0 else 0
-            
-            print(f"{room.room_id:<10} {room.capacity:<10} {scheduled_sessions:<10} {utilization:.2f}%")
-        
-        print()
-
-
-
-    def get_schedule_json_by_room(self):
-        """Return the schedule in a structured JSON format organized by room"""
-        result = {}
-
-        for room in Room.objects:
-            room_schedule = Schedule.objects(room=room).order_by('time_slot.day', 'time_slot.start_time')
-            room_data = {
-                "room_id": room.room_id,
-                "capacity": room.capacity,
-                "schedules": []
-            }
-
-            for schedule in room_schedule:
-                session_info = {
-                    "day": schedule.time_slot.day,
-                    "start_time": schedule.time_slot.start_time.strftime("%H:%M"),
-                    "end_time": schedule.time_slot.end_time.strftime("%H:%M"),
-                    "course_code": schedule.course.course_code,
-                    "course_name": schedule.course.name,
-                    "professor": schedule.teacher.name,
-                    "session_number": schedule.session_number,
-                    "total_sessions": schedule.course.lecture_hours,
-                    "enrolled_students": Student.objects(enrolled_courses=schedule.course).count()
-                }
-
-                room_data["schedules"].append(session_info)
-
-            result[room.room_id] = room_data
-
-        return result
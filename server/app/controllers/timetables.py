@@ -0,0 +1,94 @@
+import hashlib
+import json
+from ..models import StudentTimetable
+
+# Version counter bumped by writes to who teaches and who takes which course (teachers,
+# enrolments); with the reference 'data' version it tells whether two runs see the same data.
+# A student's enrolment change stamps them with the version it bumped to, and each student
+# timetable carries the version it was built from, so a run can tell which ones it built stale.
+ENROLMENT_VERSION = 'enrolment'
+
+
+def build_timetables(model, schedule):
+    """Room, teacher and student timetables of a schedule, built in one pass over it in memory
+
+    Each timetable is the JSON its read endpoint serves: rooms as /schedule/rooms
+    and /schedule/generate return them, students as in display_student_schedule,
+    and teachers in the same day-by-day layout.
+
+    Returns:
+        (rooms, teachers, students): dicts from room_id, teacher_id and student_id to timetables
+    """
+    rooms = [{
+        "room_id": model.room_codes[room],
+        "capacity": model.room_capacity[room],
+        "schedules": []
+    } for room in range(model.num_rooms)]
+    teachers = [{
+        "teacher_id": model.teacher_codes[teacher],
+        "teacher_name": model.teacher_names[teacher],
+        "schedule": {}
+    } for teacher in range(model.num_teachers)]
+    students = [{
+        "student_id": model.student_codes[student],
+        "student_name": model.student_names[student],
+        "courses": [model.course_codes[course] for course in model.student_courses[student]],
+        "schedule": {}
+    } for student in range(len(model.student_ids))]
+
+    # Slots are numbered by day, then start time, so this visits every placement in chronological order
+    for session, (slot, room) in sorted(schedule.items(), key=lambda item: item[1]):
+        course = model.session_course[session]
+        teacher = model.session_teacher[session]
+        day = model.DAYS[model.slot_day[slot]]
+        start_time = model.slot_start[slot].strftime("%H:%M")
+        end_time = model.slot_end[slot].strftime("%H:%M")
+
+        rooms[room]["schedules"].append({
+            "day": day,
+            "start_time": start_time,
+            "end_time": end_time,
+            "course_code": model.course_codes[course],
+            "course_name": model.course_names[course],
+            "professor": model.teacher_names[teacher],
+            "session_number": model.session_number[session],
+            "total_sessions": model.course_hours[course],
+            "enrolled_students": model.course_enrollment(course)
+        })
+        teachers[teacher]["schedule"].setdefault(day, []).append({
+            "start_time": start_time,
+            "end_time": end_time,
+            "course_code": model.course_codes[course],
+            "course_name": model.course_names[course],
+            "session_number": model.session_number[session],
+            "room": model.room_codes[room]
+        })
+        entry = {
+            "start_time": start_time,
+            "end_time": end_time,
+            "course_code": model.course_codes[course],
+            "session_number": model.session_number[session],
+            "room": model.room_codes[room],
+            "teacher": model.teacher_names[teacher]
+        }
+        for student in model.course_students[course]:
+            students[student]["schedule"].setdefault(day, []).append(entry)
+
+    return ({timetable["room_id"]: timetable for timetable in rooms},
+            {timetable["teacher_id"]: timetable for timetable in teachers},
+            {timetable["student_id"]: timetable for timetable in students})
+
+
+def timetable_etag(timetable):
+    """A strong ETag for a timetable: the hash of its canonical JSON"""
+    body = json.dumps(timetable, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(body.encode()).hexdigest()
+
+
+def save_student_timetable(student_id, timetable, version, enrolment_version):
+    """Store one student's timetable outside a schedule run (first view, enrolment changes); return its ETag"""
+    etag = timetable_etag(timetable)
+    StudentTimetable.objects(student_id=student_id).update_one(
+        upsert=True, set__version=version, set__enrolment_version=enrolment_version,
+        set__timetable=timetable, set__etag=etag)
+    return etag
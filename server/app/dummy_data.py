@@ -1,6 +1,7 @@
 from mongoengine import connect
 from .models import Room, Teacher, Student, Course, TimeSlot, Schedule
 from datetime import datetime, timedelta
+from .utils.reference_cache import reference_data
 import os
 from dotenv import load_dotenv
 
@@ -290,4 +291,5 @@ if __name__ == "__main__":
     clear_database()
     create_time_slots()
     populate_dummy_data()
+    reference_data.invalidate()  # Let running servers drop the data they cached
     print("Database populated successfully!")
\ No newline at end of file
@@ -5,6 +5,9 @@ from .schedule import Schedule
 from .student import Student
 from .teacher import Teacher
 from .timeSlot import TimeSlot
+from .timetable import RoomTimetable, TeacherTimetable, StudentTimetable
+from .version import Version
+from .job import Job
 
 __all__=[
     'Course',
@@ -13,5 +16,10 @@ __all__=[
     'Schedule',
     'Student',
     'Teacher',
-    'TimeSlot'
+    'TimeSlot',
+    'RoomTimetable',
+    'TeacherTimetable',
+    'StudentTimetable',
+    'Version',
+    'Job'
 ]
\ No newline at end of file
@@ -0,0 +1,47 @@
+from mongoengine import Document, StringField, IntField, DictField, DateTimeField
+
+
+class Job(Document):
+    """A schedule generation run submitted to the background worker pool (see app.controllers.jobs)"""
+    STATUSES = ('queued', 'running', 'done', 'failed')
+    ACTIVE = ('queued', 'running')
+
+    params = DictField()  # SchedulerController arguments
+    data_version = IntField(required=True)  # 'data' Version the job was submitted against
+    enrolment_version = IntField(default=0)  # ... and 'enrolment' Version
+    status = StringField(choices=STATUSES, default='queued')
+    phase = StringField()  # Run phase the job is in, e.g. 'search'
+    # Set only while queued or running: one active job per (versions, params), which duplicates join
+    active_key = StringField()
+    owner = StringField()  # Process whose pool runs the job
+    heartbeat = DateTimeField()  # Refreshed by the owner while the job is active
+    submitted_at = DateTimeField()
+    started_at = DateTimeField()
+    finished_at = DateTimeField()
+    result = DictField()  # success, complete, unplaced, reasons, stats and schedule version
+    error = StringField()  # Why a failed job crashed
+
+    meta = {
+        'indexes': [
+            {'fields': ['active_key'], 'unique': True, 'sparse': True},
+            {'fields': ['owner', 'status']}
+        ]
+    }
+
+    def status_json(self):
+        """Status and progress as the job endpoints report them"""
+        return {
+            "job_id": str(self.id),
+            "status": self.status,
+            "phase": self.phase,
+            "params": self.params,
+            "data_version": self.data_version,
+            "enrolment_version": self.enrolment_version,
+            "submitted_at": self.submitted_at.isoformat() if self.submitted_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+        }
+
+    def __str__(self):
+        return f"Job {self.id} ({self.status})"
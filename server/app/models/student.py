@@ -8,6 +8,7 @@ class Student(Document):
     major = StringField(required=True)
     year = IntField(required=True)
     enrolled_courses = ListField(ReferenceField('Course'))
+    enrolment_version = IntField(default=0)  # 'enrolment' Version bumped by the last change to enrolled_courses
     password=StringField(required=True)
     
     def __str__(self):
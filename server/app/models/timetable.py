@@ -0,0 +1,28 @@
+from mongoengine import Document, StringField, IntField, DictField
+
+
+# Denormalised timetables written by every schedule generation, one document per room,
+# teacher and student. Each holds the exact JSON its read endpoint returns, so serving
+# it is a single indexed fetch; version is the schedule version it was built from.
+
+class RoomTimetable(Document):
+    room_id = StringField(required=True, unique=True)
+    version = IntField(required=True)
+    timetable = DictField(required=True)
+
+
+class TeacherTimetable(Document):
+    teacher_id = StringField(required=True, unique=True)
+    version = IntField(required=True)
+    timetable = DictField(required=True)
+
+
+class StudentTimetable(Document):
+    student_id = StringField(required=True, unique=True)
+    version = IntField(required=True)
+    timetable = DictField(required=True)
+    enrolment_version = IntField(default=0)  # 'enrolment' Version its courses were read at
+    etag = StringField(required=True)  # Hash of timetable, the HTTP ETag of /student/schedule
+
+    # Covers the conditional-request lookup: student_id -> etag is answered from the index alone
+    meta = {'indexes': [('student_id', 'etag')]}
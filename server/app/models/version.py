@@ -0,0 +1,20 @@
+from mongoengine import Document, StringField, IntField
+
+
+class Version(Document):
+    """A named counter, bumped whenever what it versions changes (e.g. 'schedule')"""
+    name = StringField(required=True, unique=True)
+    value = IntField(default=0)
+
+    @classmethod
+    def current(cls, name):
+        version = cls.objects(name=name).only('value').first()
+        return version.value if version else 0
+
+    @classmethod
+    def bump(cls, name):
+        """Atomically increment the counter and return its new value"""
+        return cls.objects(name=name).modify(upsert=True, new=True, inc__value=1).value
+
+    def __str__(self):
+        return f"{self.name} v{self.value}"
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from ..models import Course
+from ..utils.reference_cache import reference_data
 
 course_bp = Blueprint("course", __name__)
 
@@ -44,6 +45,7 @@ def add_course():
             lecture_hours=data['credits']
         )
         course.save()
+        reference_data.invalidate()
 
         return jsonify({"message": "Course added successfully!"}), 201
 
@@ -55,15 +57,15 @@ def add_course():
 
 @course_bp.route('/course/all', methods=['GET'])
 def get_all_courses():
-    # Retrieve all courses from the database
-    courses = Course.objects.all()
+    # Retrieve all courses from the reference cache
+    courses = reference_data.courses()
     
     # Transform course data into the required JSON format for the frontend
     courses_data = [
         {
-            "course_id": course.course_code,
-            "course_name": course.name,
-            "credits": course.lecture_hours  # assuming 'credits' is a field in the course model
+            "course_id": course['course_code'],
+            "course_name": course['name'],
+            "credits": course['lecture_hours']  # assuming 'credits' is a field in the course model
         }
         for course in courses
     ]
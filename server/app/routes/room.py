@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from ..models import Room
+from ..utils.reference_cache import reference_data
 
 room_bp = Blueprint("room", __name__)
 
@@ -25,6 +26,9 @@ def add_rooms():
         except Exception as e:
             failed.append({"id": r[0], "error": str(e)})
 
+    if added:
+        reference_data.invalidate()
+
     return jsonify({
         "added": added,
         "failed": failed
@@ -1,16 +1,145 @@
-from flask import Blueprint, jsonify
+import json
+from bson import ObjectId
+from flask import Blueprint, jsonify, request, url_for
 from ..controllers.scheduler1 import SchedulerController  # Adjust if file path differs
+from ..controllers.jobs import submit_schedule_job, wait_for_job
+from ..models import RoomTimetable, Job, Version
 
 schedule_bp = Blueprint("schedule", __name__)
 
+# Seconds /schedule/generate waits for its job before handing back the job to poll instead
+GENERATE_WAIT_SECONDS = 5
+
+
+def _flag(name):
+    return request.args.get(name, 'false').lower() in ('1', 'true', 'yes')
+
+
+def _generation_params():
+    """SchedulerController arguments from the query string; raises ValueError for unknown choices"""
+    strategy = request.args.get('strategy', 'iterative')
+    if strategy not in SchedulerController.STRATEGIES:
+        raise ValueError(f"Unknown strategy '{strategy}'")
+
+    backend = request.args.get('backend', 'search')
+    if backend not in SchedulerController.BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'")
+
+    return {
+        'strategy': strategy,
+        'backend': backend,
+        'backjumping': _flag('backjumping'),
+        'workers': request.args.get('workers', type=int),  # None when absent or not a number
+        'time_budget': request.args.get('time_budget', type=float),
+        'improve_budget': request.args.get('improve', type=float),  # Seconds of schedule improvement
+        'lns_budget': request.args.get('lns', type=float),  # Seconds of large neighbourhood search
+        'incremental': _flag('incremental'),
+        'warm_start': _flag('warm_start'),
+    }
+
+
+def _submit():
+    """Submit (or join) a generation job for this request; returns (job, created, error response)"""
+    try:
+        return (*submit_schedule_job(_generation_params()), None)
+    except ValueError as e:  # e.g. the cp-sat backend without OR-Tools installed
+        return None, False, (jsonify({"error": str(e)}), 400)
+
+
+def _job_result(job, report):
+    """The response a finished job's run earned, as /schedule/generate has always answered"""
+    if job.status == 'failed':
+        return jsonify({"error": "Failed to generate schedule", "reason": job.error}), 500
+
+    result = job.result
+    stats = result['stats']
+    if not result['success']:
+        if result['reasons']:
+            return jsonify({"error": "Schedule is infeasible", "reasons": result['reasons'], "stats": stats}), 422
+        return jsonify({"error": "Failed to generate schedule", "stats": stats}), 500
+
+    # The room-wise JSON the run materialised, as long as no later run has replaced it
+    timetables = RoomTimetable.objects(version=result['version']).only('room_id', 'timetable').as_pymongo()
+    schedule_json = {t['room_id']: t['timetable'] for t in timetables}
+    if Version.current('schedule') != result['version']:
+        return jsonify({"error": "The schedule was replaced by a newer run", "stats": stats}), 410
+
+    # 206 when the time budget ran out before every session was placed
+    status = 200 if result['complete'] else 206
+    if report:
+        return jsonify({
+            "schedule": schedule_json,
+            "complete": result['complete'],
+            "unplaced": result['unplaced'],
+            "stats": stats,
+        }), status
+    # The room-keyed body stays as the frontend expects it; the run stats travel in a header
+    response = jsonify(schedule_json)
+    response.headers['X-Unplaced-Sessions'] = str(len(result['unplaced']))
+    response.headers['X-Scheduler-Stats'] = json.dumps(stats, separators=(',', ':'))
+    return response, status
+
+
+def _accepted(job, **extra):
+    """202 for a job still queued or running, pointing at its status endpoint"""
+    response = jsonify({**job.status_json(), **extra})
+    response.headers['Location'] = url_for('schedule.get_schedule_job', job_id=str(job.id))
+    return response, 202
+
+
+def _find_job(job_id):
+    return Job.objects(id=job_id).first() if ObjectId.is_valid(job_id) else None
+
+
 @schedule_bp.route('/schedule/generate', methods=['GET'])
 def generate_schedule():
-    controller = SchedulerController()
-    success = controller.generate_schedule()
+    """Generate a schedule: the schedule itself if the run finishes quickly, else 202 and its job
+
+    The run happens in the background job pool like POST /schedule/jobs, so concurrent
+    calls with the same options share one run. This request waits at most
+    GENERATE_WAIT_SECONDS; after that the client polls the job in the Location header
+    and fetches /schedule/jobs/<id>/result once it has finished.
+    """
+    job, _, error = _submit()
+    if error:
+        return error
+    job = wait_for_job(job.id, GENERATE_WAIT_SECONDS)
+    if job.status in Job.ACTIVE:
+        return _accepted(job)
+    return _job_result(job, _flag('report'))
+
+
+@schedule_bp.route('/schedule/jobs', methods=['POST'])
+def submit_schedule_job_route():
+    """Queue a schedule generation (same query options as /schedule/generate) and return its job at once"""
+    job, created, error = _submit()
+    if error:
+        return error
+    return _accepted(job, deduplicated=not created)
+
+
+@schedule_bp.route('/schedule/jobs/<job_id>', methods=['GET'])
+def get_schedule_job(job_id):
+    """Status and progress (the run phase it is in) of a generation job"""
+    job = _find_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.status_json()), 200
+
+
+@schedule_bp.route('/schedule/jobs/<job_id>/result', methods=['GET'])
+def get_schedule_job_result(job_id):
+    """The schedule a finished job produced, answered as /schedule/generate would"""
+    job = _find_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job.status in Job.ACTIVE:
+        return jsonify({**job.status_json(), "error": "Job has not finished"}), 409
+    return _job_result(job, _flag('report'))
 
-    if not success:
-        return jsonify({"error": "Failed to generate schedule"}), 500
 
-    # Send the room-wise JSON format
-    schedule_json = controller.get_schedule_json_by_room()
-    return jsonify(schedule_json), 200
+@schedule_bp.route('/schedule/rooms', methods=['GET'])
+def get_room_schedules():
+    """The last generated schedule by room, read from the materialised room timetables"""
+    timetables = RoomTimetable.objects.only('room_id', 'timetable').order_by('room_id').as_pymongo()
+    return jsonify({t['room_id']: t['timetable'] for t in timetables}), 200
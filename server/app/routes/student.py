@@ -1,7 +1,8 @@
-from flask import Blueprint, request, jsonify
-from ..models import Student, Course
+from flask import Blueprint, request, jsonify, make_response
+from ..models import Student, Course, StudentTimetable, Version
 from ..utils import auth_utils
 from ..controllers.run_scheduler1 import display_student_schedule
+from ..controllers.timetables import save_student_timetable, ENROLMENT_VERSION
 
 student_bp = Blueprint("student", __name__)
 
@@ -97,7 +98,14 @@ def enroll_courses():
         if course not in student.enrolled_courses:
             student.enrolled_courses.append(course)
 
+    # Bump after saving, so a run that read the version before this did also read the old courses
     student.save()
+    enrolment_version = Version.bump(ENROLMENT_VERSION)
+    student.update(set__enrolment_version=enrolment_version)
+
+    # The stored timetable lists the old courses: rebuild it, which also gives it a new ETag
+    save_student_timetable(student.student_id, display_student_schedule(student.student_id),
+                           Version.current('schedule'), enrolment_version)
 
     return jsonify({
         "message": f"Enrolled in {len(enrolled_courses)} course(s).",
@@ -123,13 +131,32 @@ def view_student_schedule():
     if not student_id:
         return jsonify({"message": "Invalid or expired token"}), 401
     
-    # Retrieve and display the student's schedule
+    # A browser revalidating an unchanged timetable gets a 304, answered from the (student_id, etag) index alone
+    timetables = StudentTimetable.objects(student_id=student_id)
+    if request.if_none_match:
+        stored = timetables.only('etag').exclude('id').as_pymongo().first()
+        if stored and request.if_none_match.contains(stored['etag']):
+            return _timetable_response('', stored['etag'], 304)
+
+    # One fetch of the timetable saved with the schedule; build and store it if there is none yet
+    stored = timetables.only('timetable', 'etag').as_pymongo().first()
+    if stored:
+        return _timetable_response(jsonify(stored['timetable']), stored['etag'], 200)
+
+    enrolment_version = Version.current(ENROLMENT_VERSION)
     student_schedule = display_student_schedule(student_id)
-    
     if student_schedule is None:
         return jsonify({"message": "Student schedule not found"}), 404
-    
-    return jsonify(student_schedule), 200
+    etag = save_student_timetable(student_id, student_schedule, Version.current('schedule'), enrolment_version)
+    return _timetable_response(jsonify(student_schedule), etag, 200)
+
+
+def _timetable_response(body, etag, status):
+    """Tag a timetable response so the browser revalidates it with If-None-Match on every view"""
+    response = make_response(body, status)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 
 @student_bp.route('/student/me', methods=['GET'])
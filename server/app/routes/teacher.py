@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
-from ..models import Teacher,Course
+from ..models import Teacher,Course,TeacherTimetable,Version
+from ..controllers.timetables import ENROLMENT_VERSION
 
 teacher_bp = Blueprint("teacher", __name__)
 
@@ -38,7 +39,19 @@ def add_teachers():
         except Exception as e:
             failed.append({"id": t[0], "error": str(e)})
 
+    if added:
+        Version.bump(ENROLMENT_VERSION)
+
     return jsonify({
         "added": added,
         "failed": failed
     }), 201
+
+
+@teacher_bp.route('/teacher/schedule/<teacher_id>', methods=['GET'])
+def view_teacher_schedule(teacher_id):
+    """API endpoint for a teacher's weekly schedule, read from the timetable saved with the schedule"""
+    timetable = TeacherTimetable.objects(teacher_id=teacher_id).only('timetable').as_pymongo().first()
+    if timetable is None:
+        return jsonify({"message": "Teacher schedule not found"}), 404
+    return jsonify(timetable['timetable']), 200
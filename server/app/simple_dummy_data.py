@@ -1,6 +1,7 @@
 from mongoengine import connect
 from .models import Room, Teacher, Student, Course, TimeSlot, Schedule,ResearchScholar
 from datetime import datetime, timedelta
+from .utils.reference_cache import reference_data
 import os
 from dotenv import load_dotenv
 
@@ -208,6 +209,7 @@ if __name__ == "__main__":
     clear_database()
     create_simplified_time_slots()
     populate_simplified_data()
+    reference_data.invalidate()  # Let running servers drop the data they cached
     print("Database populated successfully with simplified data for quick scheduling!")
 
 
@@ -0,0 +1,44 @@
+from .conflicts import DenseConflictMatrix, SparseConflictMatrix, build_conflict_matrix
+from .model import ProblemModel, compile_problem
+from .occupancy import OccupancyIndex
+from .rooms import SlotCapacityBound, match_rooms
+from .search import ForwardCheckingSearch, VALUE_ORDERS
+from .decompose import find_components, pack_components, share_rooms, solve_components
+from .portfolio import PORTFOLIO, portfolio_configs, solve_portfolio
+from .improve import SOFT_WEIGHTS, SoftConstraints, LocalSearch, relabel_sessions
+from .lns import LargeNeighbourhoodSearch
+from .repair import repair_schedule
+from .partial import complete_partial, blocking_constraints
+from .feasibility import check_feasibility
+from .cpsat import CPSAT_AVAILABLE, CpSatSearch
+
+__all__=[
+    'DenseConflictMatrix',
+    'SparseConflictMatrix',
+    'build_conflict_matrix',
+    'ProblemModel',
+    'compile_problem',
+    'OccupancyIndex',
+    'SlotCapacityBound',
+    'match_rooms',
+    'ForwardCheckingSearch',
+    'VALUE_ORDERS',
+    'find_components',
+    'pack_components',
+    'share_rooms',
+    'solve_components',
+    'PORTFOLIO',
+    'portfolio_configs',
+    'solve_portfolio',
+    'SOFT_WEIGHTS',
+    'SoftConstraints',
+    'LocalSearch',
+    'relabel_sessions',
+    'LargeNeighbourhoodSearch',
+    'repair_schedule',
+    'complete_partial',
+    'blocking_constraints',
+    'check_feasibility',
+    'CPSAT_AVAILABLE',
+    'CpSatSearch'
+]
@@ -0,0 +1,111 @@
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Catalogues up to this many courses get an n x n dense matrix; larger ones a sparse adjacency
+DENSE_THRESHOLD = 1024
+
+
+class DenseConflictMatrix:
+    """Course conflict matrix backed by one bitset row and one count row per course"""
+
+    def __init__(self, num_courses):
+        self.num_courses = num_courses
+        self._rows = [0] * num_courses  # Bit b of row a is set if a and b share a student
+        self._counts = [0] * (num_courses * num_courses)  # Shared students, row-major
+
+    def _add(self, a, b):
+        n = self.num_courses
+        self._rows[a] |= 1 << b
+        self._rows[b] |= 1 << a
+        self._counts[a * n + b] += 1
+        self._counts[b * n + a] += 1
+
+    def conflicts(self, a, b):
+        """Check if at least one student is enrolled in both courses"""
+        return (self._rows[a] >> b) & 1 == 1
+
+    def overlap(self, a, b):
+        """Number of students enrolled in both courses"""
+        return self._counts[a * self.num_courses + b]
+
+    def row(self, a):
+        """Bitset of the courses that conflict with a"""
+        return self._rows[a]
+
+    def neighbours(self, a):
+        """Indices of the courses that conflict with a"""
+        row = self._rows[a]
+        result = []
+        while row:
+            low = row & -row
+            result.append(low.bit_length() - 1)
+            row ^= low
+        return result
+
+    def degree(self, a):
+        """Number of courses that conflict with a"""
+        return self._rows[a].bit_count()
+
+
+class SparseConflictMatrix:
+    """Course conflict matrix backed by one {course: shared students} dict per course"""
+
+    def __init__(self, num_courses):
+        self.num_courses = num_courses
+        self._adjacency = [{} for _ in range(num_courses)]
+
+    def _add(self, a, b):
+        self._adjacency[a][b] = self._adjacency[a].get(b, 0) + 1
+        self._adjacency[b][a] = self._adjacency[b].get(a, 0) + 1
+
+    def conflicts(self, a, b):
+        """Check if at least one student is enrolled in both courses"""
+        return b in self._adjacency[a]
+
+    def overlap(self, a, b):
+        """Number of students enrolled in both courses"""
+        return self._adjacency[a].get(b, 0)
+
+    def row(self, a):
+        """Bitset of the courses that conflict with a"""
+        row = 0
+        for b in self._adjacency[a]:
+            row |= 1 << b
+        return row
+
+    def neighbours(self, a):
+        """Indices of the courses that conflict with a"""
+        return list(self._adjacency[a])
+
+    def degree(self, a):
+        """Number of courses that conflict with a"""
+        return len(self._adjacency[a])
+
+
+def build_conflict_matrix(student_courses, num_courses, dense_threshold=DENSE_THRESHOLD):
+    """Build a symmetric course conflict matrix in one pass over student enrollments
+
+    Args:
+        student_courses: For every student, the list of course indices they are enrolled in
+        num_courses: Total number of courses
+        dense_threshold: Largest catalogue that still gets the dense representation
+
+    Returns:
+        A DenseConflictMatrix or SparseConflictMatrix; both answer conflicts() and overlap() in O(1)
+    """
+    if num_courses <= dense_threshold:
+        matrix = DenseConflictMatrix(num_courses)
+    else:
+        matrix = SparseConflictMatrix(num_courses)
+
+    for courses in student_courses:
+        for i, a in enumerate(courses):
+            for b in courses[i + 1:]:
+                if a != b:
+                    matrix._add(a, b)
+
+    edges = sum(matrix.degree(c) for c in range(num_courses)) // 2
+    logger.info(f"Built {type(matrix).__name__} for {num_courses} courses with {edges} conflicting pairs.")
+    return matrix
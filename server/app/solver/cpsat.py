@@ -0,0 +1,147 @@
+import time
+import logging
+from .rooms import SlotCapacityBound, match_rooms
+
+try:
+    from ortools.sat.python import cp_model
+except ImportError:  # OR-Tools is optional; only the 'cp-sat' backend needs it
+    cp_model = None
+
+CPSAT_AVAILABLE = cp_model is not None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class CpSatSearch:
+    """The same hard constraints handed to OR-Tools' CP-SAT solver instead of our own search.
+
+    A drop-in for ForwardCheckingSearch: it takes the compiled model, an occupancy
+    index holding anything already placed and the sessions to place, and solve()
+    leaves the result in assignment and records it in occupancy.
+
+    Like the two-phase search it only decides time slots. There is a 0/1 variable
+    for each session and each slot it may take, and constraints for:
+    - one slot per session;
+    - one session per teacher per slot, and at most the daily limit per day;
+    - one session per slot among the courses of any one student;
+    - per slot, for every room capacity, no more sessions needing at least that
+      capacity than free rooms holding it (see SlotCapacityBound).
+    The last set is exactly Hall's condition for the nested room sets, so every
+    slot's sessions are then guaranteed distinct rooms by match_rooms.
+    """
+
+    def __init__(self, model, occupancy, sessions=None, preferred=None, deadline=None, workers=None):
+        if cp_model is None:
+            raise ImportError("The 'cp-sat' backend needs OR-Tools: pip install ortools")
+        self.model = model
+        self.occupancy = occupancy
+        self.sessions = list(range(model.num_sessions)) if sessions is None else list(sessions)
+        self.preferred = preferred or {}
+        self.deadline = deadline
+        self.workers = workers
+        self.assignment = {}
+        self.best_partial = {}  # CP-SAT has no partial schedules to offer; kept for the search interface
+        self.timed_out = False
+        self.status = None
+        # Counters in the same terms as ForwardCheckingSearch: CP-SAT branches and conflicts
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.checks = {}
+
+    def solve(self):
+        """Place every session; return True on success with the result in self.assignment"""
+        model = self.model
+        occupancy = self.occupancy
+        bound = SlotCapacityBound(model, occupancy)
+        cp = cp_model.CpModel()
+
+        # x[session][slot], only for slots the session could take given what is already placed
+        x = {}
+        for session in self.sessions:
+            course = model.session_course[session]
+            teacher = model.session_teacher[session]
+            x[session] = {
+                slot: cp.NewBoolVar(f"x{session}_{slot}")
+                for slot in range(model.num_slots)
+                if occupancy.teacher_free(slot, teacher)
+                and occupancy.under_daily_limit(teacher, model.slot_day[slot])
+                and occupancy.students_free(slot, course)
+                and bound.can_host(slot, course)
+            }
+            if not x[session]:
+                logger.info(f"CP-SAT: {model.describe_session(session)} has no possible time slot.")
+                return False
+            cp.AddExactlyOne(x[session].values())
+            placement = self.preferred.get(session)
+            if placement is not None and placement[0] in x[session]:
+                cp.AddHint(x[session][placement[0]], 1)
+
+        by_teacher = {}
+        by_course = {}
+        for session in self.sessions:
+            by_teacher.setdefault(model.session_teacher[session], []).append(session)
+            by_course.setdefault(model.session_course[session], []).append(session)
+
+        for teacher, sessions in by_teacher.items():
+            for slot in range(model.num_slots):
+                cp.AddAtMostOne(x[s][slot] for s in sessions if slot in x[s])
+            limits = occupancy.teacher_day_count[teacher]
+            for day in range(len(model.DAYS)):
+                cp.Add(sum(x[s][slot] for s in sessions for slot in x[s] if model.slot_day[slot] == day)
+                       <= occupancy.max_sessions_per_teacher_per_day - limits[day])
+
+        # Each student's courses pairwise clash, so one constraint per distinct enrolment covers every conflict
+        enrolments = set()
+        for courses in model.student_courses:
+            placed = frozenset(c for c in courses if c in by_course)
+            if len(placed) > 1:
+                enrolments.add(placed)
+        for courses in enrolments:
+            sessions = [s for c in courses for s in by_course[c]]
+            for slot in range(model.num_slots):
+                cp.AddAtMostOne(x[s][slot] for s in sessions if slot in x[s])
+
+        for slot in range(model.num_slots):
+            for level, slack in enumerate(bound.slack[slot]):
+                needing = [x[s][slot] for s in self.sessions
+                           if slot in x[s] and bound.course_class[model.session_course[s]] >= level]
+                if len(needing) > slack:
+                    cp.Add(sum(needing) <= slack)
+
+        # Sessions of a course are interchangeable: take them in slot order
+        for sessions in by_course.values():
+            sessions.sort(key=lambda s: model.session_number[s])
+            for a, b in zip(sessions, sessions[1:]):
+                cp.Add(sum(slot * v for slot, v in x[a].items()) < sum(slot * v for slot, v in x[b].items()))
+
+        solver = cp_model.CpSolver()
+        # A pure feasibility model: the LP relaxation costs more time than it prunes
+        solver.parameters.linearization_level = 0
+        if self.deadline is not None:
+            solver.parameters.max_time_in_seconds = max(self.deadline - time.monotonic(), 0.0)
+        if self.workers:
+            solver.parameters.num_workers = self.workers
+        self.status = solver.Solve(cp)
+        self.nodes = solver.NumBranches()
+        self.backtracks = solver.NumConflicts()
+        logger.info(f"CP-SAT finished with {solver.StatusName(self.status)} after {solver.WallTime():.2f}s, "
+                    f"{solver.NumBranches()} branches and {solver.NumConflicts()} conflicts.")
+        if self.status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            self.timed_out = self.status == cp_model.UNKNOWN
+            return False
+
+        by_slot = {}
+        for session in self.sessions:
+            slot = next(slot for slot, v in x[session].items() if solver.Value(v))
+            by_slot.setdefault(slot, []).append(session)
+        for slot, sessions in by_slot.items():
+            rooms = match_rooms(model, sessions, occupancy.room_busy[slot],
+                                {s: self.preferred[s][1] for s in sessions if s in self.preferred})
+            if rooms is None:  # Cannot happen while the capacity constraints hold
+                raise RuntimeError(f"CP-SAT schedule leaves time slot {model.slot_codes[slot]} without enough rooms")
+            for session, room in rooms.items():
+                self.assignment[session] = (slot, room)
+                occupancy.assign(session, slot, room)
+        return True
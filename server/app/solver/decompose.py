@@ -0,0 +1,178 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import logging
+from .occupancy import OccupancyIndex
+from .search import ForwardCheckingSearch
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Courses that fit in at most this many rooms compete for the same few large rooms,
+# so they are kept in one component, which then gets those rooms to itself
+BOTTLENECK_ROOMS = 2
+
+
+def find_components(model, sessions=None):
+    """Split the sessions into groups that share no students, teachers or bottleneck rooms
+
+    Courses are joined (union-find) when they share a student or a teacher, and all
+    courses that only fit in BOTTLENECK_ROOMS rooms or fewer are joined together. Session
+    order within each component follows the given sessions, largest component first.
+    """
+    sessions = list(range(model.num_sessions)) if sessions is None else list(sessions)
+    parent = list(range(model.num_courses))
+
+    def find(c):
+        while parent[c] != c:
+            parent[c] = parent[parent[c]]
+            c = parent[c]
+        return c
+
+    def union(a, b):
+        a, b = find(a), find(b)
+        if a != b:
+            parent[b] = a
+
+    for course in range(model.num_courses):
+        for other in model.conflicts.neighbours(course):
+            union(course, other)
+
+    first_course_of_teacher = {}
+    bottleneck = -1
+    for course in range(model.num_courses):
+        teacher = model.course_teacher[course]
+        if teacher != -1:
+            if teacher in first_course_of_teacher:
+                union(first_course_of_teacher[teacher], course)
+            else:
+                first_course_of_teacher[teacher] = course
+        fitting = sum(1 for room in range(model.num_rooms) if model.room_fits(course, room))
+        if fitting <= BOTTLENECK_ROOMS:
+            if bottleneck == -1:
+                bottleneck = course
+            else:
+                union(bottleneck, course)
+
+    components = {}
+    for session in sessions:
+        components.setdefault(find(model.session_course[session]), []).append(session)
+    return sorted(components.values(), key=len, reverse=True)
+
+
+def pack_components(components, bins):
+    """Group components into at most the given number of bins of similar size (largest first)"""
+    packed = [[] for _ in range(min(bins, len(components)))]
+    for component in sorted(components, key=len, reverse=True):
+        min(packed, key=len).extend(component)
+    return [group for group in packed if group]
+
+
+def share_rooms(model, groups):
+    """Give every group of sessions its own rooms, as a bitmask per group
+
+    Rooms are handed out largest first. A room goes to a group that cannot otherwise
+    hold its big classes (more sessions too large for the remaining rooms than its rooms
+    so far have slots for); failing that, to the group with the most sessions per room slot.
+    """
+    num_slots = max(model.num_slots, 1)
+    rooms = sorted(range(model.num_rooms), key=lambda r: model.room_capacity[r], reverse=True)
+    enrolments = [sorted((model.course_enrollment(model.session_course[s]) for s in group), reverse=True)
+                  for group in groups]
+    allocated = [0] * len(groups)
+    masks = [0] * len(groups)
+
+    for i, room in enumerate(rooms):
+        smaller = model.room_capacity[rooms[i + 1]] if i + 1 < len(rooms) else -1
+
+        def shortfall(g):
+            too_big = sum(1 for enrolled in enrolments[g] if enrolled > smaller)
+            return -(-too_big // num_slots) - allocated[g]
+
+        def load(g):
+            return len(groups[g]) / (allocated[g] * num_slots) if allocated[g] else float('inf')
+
+        best = max(range(len(groups)), key=lambda g: (max(shortfall(g), 0), load(g)))
+        masks[best] |= 1 << room
+        allocated[best] += 1
+    return masks
+
+
+def rooms_can_hold(model, sessions, rooms):
+    """Hall's condition over capacities: for every room size, the sessions needing at least
+    that size must not outnumber the room slots of at least that size in the rooms bitmask"""
+    for cap in set(model.room_capacity[r] for r in range(model.num_rooms) if (rooms >> r) & 1):
+        needing = sum(1 for s in sessions if model.course_enrollment(model.session_course[s]) > cap)
+        larger = sum(1 for r in range(model.num_rooms) if (rooms >> r) & 1 and model.room_capacity[r] > cap)
+        if needing > larger * model.num_slots:
+            return False
+    return len(sessions) <= rooms.bit_count() * model.num_slots
+
+
+def _solve_group(model, max_sessions_per_teacher_per_day, sessions, rooms, backjumping, static_order, preferred,
+                 deadline):
+    """Schedule one group of components using only the rooms in the rooms bitmask
+
+    Returns (assignment or None, the search's SearchCounters).
+    """
+    occupancy = OccupancyIndex(model, max_sessions_per_teacher_per_day)
+    others = ((1 << model.num_rooms) - 1) & ~rooms
+    for slot in range(model.num_slots):
+        occupancy.room_busy[slot] = others
+    search = ForwardCheckingSearch(model, occupancy, sessions, defer_rooms=True,
+                                   backjumping=backjumping, static_order=static_order, preferred=preferred,
+                                   deadline=deadline)
+    if not search.solve():
+        return None, search.counters()
+    return search.assignment, search.counters()
+
+
+def solve_components(model, occupancy, components, workers, backjumping=False, static_order=False, preferred=None,
+                     deadline=None):
+    """Solve independent components in a process pool and merge them into one schedule
+
+    Components share no students or teachers, so rooms are the only thing they compete
+    for. The components are packed into one group per worker and every group gets its
+    own share of the rooms (see share_rooms); groups are then solved in parallel with the
+    two-phase search and their schedules can be merged as they are. A share can be too
+    small where the global problem is still feasible, in which case None is returned.
+    preferred placements (session -> (slot, room)) are tried first and every group gives up
+    at the deadline (a time.monotonic() value), as in ForwardCheckingSearch.
+
+    Returns:
+        (schedule, searches): a dict session -> (slot, room), or None if some group has
+        no schedule, and the SearchCounters of every group search that finished
+    """
+    groups = pack_components(components, min(workers, model.num_rooms))
+    rooms = share_rooms(model, groups)
+    for group, mask in zip(groups, rooms):
+        if not rooms_can_hold(model, group, mask):
+            logger.info(f"Group of {len(group)} sessions cannot fit in its {mask.bit_count()} rooms.")
+            return None, []
+
+    schedule = {}
+    searches = []
+    context = multiprocessing.get_context('spawn')  # Never fork a process holding a Mongo client
+    # The model travels with each task rather than through an initializer, which would make the
+    # spawned workers start (and import the app) one after another
+    with ProcessPoolExecutor(max_workers=len(groups), mp_context=context) as pool:
+        futures = [pool.submit(_solve_group, model, occupancy.max_sessions_per_teacher_per_day, group, mask,
+                               backjumping, static_order,
+                               {s: preferred[s] for s in group if s in preferred} if preferred else None,
+                               deadline)
+                   for group, mask in zip(groups, rooms)]
+        for group, mask, future in zip(groups, rooms, futures):
+            result, counters = future.result()
+            searches.append(counters)
+            if result is None:
+                logger.info(f"Group of {len(group)} sessions has no schedule in its {mask.bit_count()} rooms.")
+                for other in futures:
+                    other.cancel()
+                return None, searches
+            schedule.update(result)
+
+    for session, (slot, room) in schedule.items():
+        occupancy.assign(session, slot, room)
+
+    logger.info(f"Merged {len(components)} components solved in {len(groups)} groups "
+                f"into {len(schedule)} scheduled sessions.")
+    return schedule, searches
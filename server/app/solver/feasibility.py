@@ -0,0 +1,179 @@
+import heapq
+import logging
+from .search import iter_bits
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Clique seeds grown at most, keeping the check to milliseconds on large enrolments
+MAX_CLIQUE_SEEDS = 256
+
+
+def check_feasibility(model, max_sessions_per_teacher_per_day):
+    """Look for reasons no complete schedule can exist, before any search is run
+
+    Every check is a necessary condition, so a reported problem is a proof of
+    infeasibility; an empty list does not prove a schedule exists.
+
+    Returns:
+        A list of {'check', 'message', ...details} dicts, one per problem found
+    """
+    problems = []
+    problems.extend(_oversized_courses(model))
+    problems.extend(_teacher_load(model, max_sessions_per_teacher_per_day))
+    problems.extend(_room_capacity(model))
+    problems.extend(_conflict_cliques(model))
+    for problem in problems:
+        logger.warning(f"Infeasible: {problem['message']}")
+    return problems
+
+
+def _course_sessions(model):
+    """Number of sessions to place per course (0 for courses nobody can teach)"""
+    counts = [0] * model.num_courses
+    for course in model.session_course:
+        counts[course] += 1
+    return counts
+
+
+def _oversized_courses(model):
+    """Courses with more students than the largest room holds"""
+    largest = max(model.room_capacity, default=0)
+    sessions = _course_sessions(model)
+    for course in range(model.num_courses):
+        enrolled = model.course_enrollment(course)
+        if sessions[course] and enrolled > largest:
+            yield {
+                'check': 'room_too_small',
+                'message': f"{model.course_codes[course]} has {enrolled} students but the largest room "
+                           f"holds {largest}.",
+                'course_code': model.course_codes[course],
+                'enrolled_students': enrolled,
+                'largest_room': largest,
+            }
+
+
+def _teacher_load(model, max_sessions_per_teacher_per_day):
+    """Teachers with more sessions than their daily limit lets them teach in the week"""
+    slots_per_day = [0] * len(model.DAYS)
+    for slot in range(model.num_slots):
+        slots_per_day[model.slot_day[slot]] += 1
+    available = sum(min(count, max_sessions_per_teacher_per_day) for count in slots_per_day)
+
+    load = [0] * model.num_teachers
+    for teacher in model.session_teacher:
+        load[teacher] += 1
+    for teacher, sessions in enumerate(load):
+        if sessions > available:
+            yield {
+                'check': 'teacher_load',
+                'message': f"{model.teacher_names[teacher]} has {sessions} sessions but can teach at most "
+                           f"{available} ({max_sessions_per_teacher_per_day} per day over the week's slots).",
+                'teacher': model.teacher_names[teacher],
+                'sessions': sessions,
+                'available': available,
+            }
+
+
+def _room_capacity(model):
+    """Sessions needing rooms of at least some size against the room-slots of that size
+
+    Every session needs a room holding its class, so for each capacity c the sessions
+    of courses larger than the next smaller capacity must fit into num_slots times the
+    rooms of capacity c or more.
+    """
+    capacities = sorted(set(model.room_capacity))
+    demand = [0] * len(capacities)  # Sessions whose smallest fitting capacity is capacities[j]
+    for course in model.session_course:
+        enrolled = model.course_enrollment(course)
+        level = next((j for j, cap in enumerate(capacities) if cap >= enrolled), None)
+        if level is not None:  # Courses that fit no room are reported by _oversized_courses
+            demand[level] += 1
+
+    needing = 0
+    for j in range(len(capacities) - 1, -1, -1):
+        needing += demand[j]
+        rooms = sum(1 for cap in model.room_capacity if cap >= capacities[j])
+        if needing > rooms * model.num_slots:
+            yield {
+                'check': 'room_capacity',
+                'message': f"{needing} sessions need a room for at least {capacities[j]} students but only "
+                           f"{rooms} such rooms x {model.num_slots} time slots exist.",
+                'min_capacity': capacities[j],
+                'sessions': needing,
+                'room_slots': rooms * model.num_slots,
+            }
+            return  # Smaller capacities repeat the same shortfall
+
+
+def _conflict_cliques(model):
+    """Greedy maximum-weight clique of courses that can never share a time slot
+
+    Two courses clash when they share a student or a teacher, so every session of a
+    clique needs its own slot. Cliques are grown greedily from seeds: the distinct
+    student enrolments (each a clique already), heaviest first, then every course on
+    its own, capped at MAX_CLIQUE_SEEDS and skipping seeds inside a clique already
+    found. The heaviest clique is reported if its sessions outnumber the time slots.
+    """
+    sessions = _course_sessions(model)
+    teacher_courses = [0] * model.num_teachers
+    for course in range(model.num_courses):
+        if sessions[course]:
+            teacher_courses[model.course_teacher[course]] |= 1 << course
+    scheduled = sum(1 << course for course in range(model.num_courses) if sessions[course])
+    adjacent = []
+    for course in range(model.num_courses):
+        row = model.conflicts.row(course)
+        if sessions[course]:
+            row |= teacher_courses[model.course_teacher[course]]
+        adjacent.append(row & scheduled & ~(1 << course))
+
+    # Courses grouped by session count, heaviest group first: the next course to add is
+    # the lowest candidate bit in the heaviest group with any, with no max to recompute
+    groups = {}
+    for course in iter_bits(scheduled):
+        groups[sessions[course]] = groups.get(sessions[course], 0) | 1 << course
+    groups = sorted(groups.items(), reverse=True)
+
+    # Many students share an enrolment: only the distinct ones, heaviest first, can seed a clique
+    enrolments = set(map(frozenset, model.student_courses))
+    heaviest = heapq.nlargest(MAX_CLIQUE_SEEDS, enrolments,
+                              key=lambda courses: sum(map(sessions.__getitem__, courses)))
+    seeds = [sum(1 << course for course in courses) & scheduled for courses in heaviest]
+    seeds = [seed for seed in seeds if seed] + [1 << course for _, mask in groups for course in iter_bits(mask)]
+
+    best_weight = 0
+    best = 0
+    found = []
+    for clique in seeds:
+        if len(found) == MAX_CLIQUE_SEEDS:
+            break
+        if any(clique & ~other == 0 for other in found):
+            continue  # Already inside a clique found, so it would mostly regrow that one
+        candidates = scheduled
+        for course in iter_bits(clique):
+            candidates &= adjacent[course]
+        while candidates:
+            for _, mask in groups:
+                pick = candidates & mask
+                if pick:
+                    low = pick & -pick
+                    break
+            clique |= low
+            candidates &= adjacent[low.bit_length() - 1]
+        found.append(clique)
+        weight = sum(sessions[course] for course in iter_bits(clique))
+        if weight > best_weight:
+            best_weight = weight
+            best = clique
+
+    if best_weight > model.num_slots:
+        codes = [model.course_codes[course] for course in iter_bits(best)]
+        yield {
+            'check': 'conflict_clique',
+            'message': f"{len(codes)} courses pairwise share students or a teacher and need {best_weight} "
+                       f"distinct time slots, but only {model.num_slots} exist: {', '.join(codes)}.",
+            'courses': codes,
+            'sessions': best_weight,
+            'time_slots': model.num_slots,
+        }
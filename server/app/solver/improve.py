@@ -0,0 +1,248 @@
+import math
+import random
+import time
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Penalty per student idle hour between classes, per extra session of a course on one
+# day, and per empty seat in the room a session is given
+SOFT_WEIGHTS = {
+    'student_gaps': 1.0,
+    'same_day': 5.0,
+    'empty_seats': 0.05,
+}
+
+# Simulated annealing temperatures at the start and at the end of the time budget
+START_TEMPERATURE = 10.0
+END_TEMPERATURE = 0.01
+
+
+def day_gaps(mask):
+    """Idle hours between the first and last class in a bitmask of a day's slots"""
+    if not mask:
+        return 0
+    first = (mask & -mask).bit_length() - 1
+    return mask.bit_length() - first - mask.bit_count()
+
+
+class SoftConstraints:
+    """Incremental quality score of a schedule; lower is better.
+
+    add() and remove() update the score for one session and return the change,
+    touching only that session's course, room and enrolled students, so the cost
+    of a move never depends on the size of the rest of the schedule.
+    """
+
+    def __init__(self, model, weights=None):
+        self.model = model
+        self.weights = dict(SOFT_WEIGHTS, **(weights or {}))
+
+        # Position of every slot within its day, for the per-day bitmasks below
+        self.slot_position = []
+        seen = [0] * len(model.DAYS)
+        for slot in range(model.num_slots):
+            self.slot_position.append(seen[model.slot_day[slot]])
+            seen[model.slot_day[slot]] += 1
+        # day_gaps() of every possible day bitmask, looked up instead of recomputed
+        self.gaps = [day_gaps(mask) for mask in range(1 << max(seen))]
+
+        # Bit p of student_days[student][day] is set when the student has a class at position p
+        self.student_days = [[0] * len(model.DAYS) for _ in range(len(model.student_ids))]
+        self.course_days = [[0] * len(model.DAYS) for _ in range(model.num_courses)]
+        self.terms = {name: 0.0 for name in self.weights}
+        self.total = 0.0
+
+    def add(self, session, slot, room):
+        """Score a session placed in (slot, room) and return the change in cost"""
+        return self._update(session, slot, room, 1)
+
+    def remove(self, session, slot, room):
+        """Undo add() for the same placement and return the change in cost"""
+        return self._update(session, slot, room, -1)
+
+    def _update(self, session, slot, room, sign):
+        model = self.model
+        course = model.session_course[session]
+        day = model.slot_day[slot]
+        bit = 1 << self.slot_position[slot]
+
+        table = self.gaps
+        student_days = self.student_days
+        gaps = 0
+        if sign > 0:
+            for student in model.course_students[course]:
+                days = student_days[student]
+                before = days[day]
+                days[day] = before | bit
+                gaps += table[before | bit] - table[before]
+        else:
+            for student in model.course_students[course]:
+                days = student_days[student]
+                before = days[day]
+                days[day] = before & ~bit
+                gaps += table[before & ~bit] - table[before]
+
+        counts = self.course_days[course]
+        before = counts[day]
+        counts[day] = before + sign
+        same_day = max(counts[day] - 1, 0) - max(before - 1, 0)
+
+        empty_seats = sign * (model.room_capacity[room] - model.course_enrollment(course))
+
+        delta = 0.0
+        for name, change in (('student_gaps', gaps), ('same_day', same_day), ('empty_seats', empty_seats)):
+            weighted = self.weights[name] * change
+            self.terms[name] += weighted
+            delta += weighted
+        self.total += delta
+        return delta
+
+
+class LocalSearch:
+    """Simulated annealing over a complete schedule, keeping every hard constraint.
+
+    Each step either moves one session to another (slot, room) or swaps the
+    placements of two sessions; a move is only tried if the occupancy index says
+    it is feasible. Worse moves are accepted with probability exp(-delta / T) while
+    the temperature cools from START_TEMPERATURE to END_TEMPERATURE over the time
+    budget, and the best schedule seen is the one returned.
+    """
+
+    def __init__(self, model, occupancy, schedule, weights=None, seed=None):
+        self.model = model
+        self.occupancy = occupancy  # Must already hold every placement in schedule
+        self.schedule = dict(schedule)
+        self.sessions = list(self.schedule)
+        self.random = random.Random(seed)
+        self.soft = SoftConstraints(model, weights)
+        for session, (slot, room) in self.schedule.items():
+            self.soft.add(session, slot, room)
+
+        # Rooms large enough for each course
+        self.fitting_rooms = [[r for r in range(model.num_rooms) if model.room_fits(c, r)]
+                              for c in range(model.num_courses)]
+
+        self.moves = 0
+        self.accepted = 0
+
+    def improve(self, time_budget):
+        """Anneal for time_budget seconds and return the best schedule found"""
+        if len(self.sessions) < 2:
+            return self.schedule
+        initial = self.soft.total
+        best_cost = initial
+        best = dict(self.schedule)
+
+        start = time.monotonic()
+        temperature = START_TEMPERATURE
+        while True:
+            if self.moves % 256 == 0:
+                elapsed = (time.monotonic() - start) / time_budget if time_budget > 0 else 1.0
+                if elapsed >= 1.0:
+                    break
+                temperature = START_TEMPERATURE * (END_TEMPERATURE / START_TEMPERATURE) ** elapsed
+            self.moves += 1
+
+            if self.random.random() < 0.5:
+                undo = self._try_move()
+            else:
+                undo = self._try_swap()
+            if undo is None:
+                continue
+            delta, revert = undo
+            if delta <= 0 or self.random.random() < math.exp(-delta / temperature):
+                self.accepted += 1
+                if self.soft.total < best_cost - 1e-9:
+                    best_cost = self.soft.total
+                    best = dict(self.schedule)
+            else:
+                revert()
+
+        self._restore(best)
+        logger.info(f"Local search made {self.accepted} of {self.moves} moves and lowered the soft cost "
+                    f"from {initial:.1f} to {best_cost:.1f} "
+                    f"({', '.join(f'{name} {value:.1f}' for name, value in self.soft.terms.items())}).")
+        return self.schedule
+
+    def _lift(self, session):
+        slot, room = self.schedule.pop(session)
+        self.occupancy.unassign(session, slot, room)
+        return self.soft.remove(session, slot, room)
+
+    def _drop(self, session, slot, room):
+        self.schedule[session] = (slot, room)
+        self.occupancy.assign(session, slot, room)
+        return self.soft.add(session, slot, room)
+
+    def _try_move(self):
+        """Move a random session to a random feasible (slot, room); returns (delta, revert) or None"""
+        session = self.random.choice(self.sessions)
+        old_slot, old_room = self.schedule[session]
+        slot = self.random.randrange(self.model.num_slots)
+        room = self.random.choice(self.fitting_rooms[self.model.session_course[session]])
+        if (slot, room) == (old_slot, old_room):
+            return None
+
+        delta = self._lift(session)
+        if not self.occupancy.can_assign(session, slot, room):
+            self._drop(session, old_slot, old_room)
+            return None
+        delta += self._drop(session, slot, room)
+
+        def revert():
+            self._lift(session)
+            self._drop(session, old_slot, old_room)
+        return delta, revert
+
+    def _try_swap(self):
+        """Exchange the placements of two random sessions; returns (delta, revert) or None"""
+        a, b = self.random.sample(self.sessions, 2)
+        slot_a, room_a = self.schedule[a]
+        slot_b, room_b = self.schedule[b]
+        if slot_a == slot_b:
+            return None
+
+        delta = self._lift(a) + self._lift(b)
+        if self.occupancy.can_assign(a, slot_b, room_b):
+            delta += self._drop(a, slot_b, room_b)
+            if self.occupancy.can_assign(b, slot_a, room_a):
+                delta += self._drop(b, slot_a, room_a)
+
+                def revert():
+                    self._lift(a)
+                    self._lift(b)
+                    self._drop(a, slot_a, room_a)
+                    self._drop(b, slot_b, room_b)
+                return delta, revert
+            self._lift(a)
+        self._drop(a, slot_a, room_a)
+        self._drop(b, slot_b, room_b)
+        return None
+
+    def _restore(self, best):
+        """Put the best schedule back in place, in the occupancy index and the score"""
+        for session in list(self.schedule):
+            if self.schedule[session] != best[session]:
+                self._lift(session)
+        for session, (slot, room) in best.items():
+            if session not in self.schedule:
+                self._drop(session, slot, room)
+
+
+def relabel_sessions(model, schedule):
+    """Give each course's placements to its sessions in session-number order
+
+    Sessions of one course are interchangeable, so after moves have shuffled them
+    the earliest placement is handed back to session 1, the next to session 2, and so on.
+    """
+    by_course = {}
+    for session in schedule:
+        by_course.setdefault(model.session_course[session], []).append(session)
+    relabelled = {}
+    for sessions in by_course.values():
+        placements = sorted(schedule[s] for s in sessions)
+        for session, placement in zip(sorted(sessions, key=lambda s: model.session_number[s]), placements):
+            relabelled[session] = placement
+    return relabelled
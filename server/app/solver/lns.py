@@ -0,0 +1,170 @@
+from concurrent.futures import ProcessPoolExecutor, wait
+import multiprocessing
+import random
+import time
+import logging
+from .improve import SoftConstraints
+from .occupancy import OccupancyIndex
+from .search import ForwardCheckingSearch
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Sessions freed per neighbourhood and nodes spent re-solving it; small enough to search exhaustively
+MAX_NEIGHBOURHOOD = 8
+NEIGHBOURHOOD_NODE_LIMIT = 2000
+
+# No round starts with less of the time budget left than this
+MIN_ROUND_SECONDS = 0.05
+
+NEIGHBOURHOODS = ('day', 'department', 'room')
+
+
+# Each pool worker gets its own copy of the compiled model once, in the initializer
+_worker_model = None
+_worker_daily_limit = None
+
+
+def _init_worker(model, max_sessions_per_teacher_per_day):
+    global _worker_model, _worker_daily_limit
+    _worker_model = model
+    _worker_daily_limit = max_sessions_per_teacher_per_day
+
+
+def _resolve_neighbourhood(day, placements, freed, seed, deadline):
+    """Re-solve the freed sessions within one day around that day's other placements
+
+    Soft costs and hard constraints never cross days, so only the day's own placements
+    matter. Every schedule the search finds (up to NEIGHBOURHOOD_NODE_LIMIT nodes, and
+    until the deadline, a time.monotonic() value) is scored and the best one is returned
+    as (gain, {session: (slot, room)}), or None if nothing beats the current placement.
+    """
+    if time.monotonic() >= deadline:  # Queued behind the pool starting up until the budget ran out
+        return None
+    model = _worker_model
+    occupancy = OccupancyIndex(model, _worker_daily_limit)
+    soft = SoftConstraints(model)
+    for session, (slot, room) in placements.items():
+        soft.add(session, slot, room)
+        if session not in freed:
+            occupancy.assign(session, slot, room)
+
+    current = 0.0
+    for session in freed:
+        current += soft.remove(session, *placements[session])
+
+    day_slots = 0
+    for slot in range(model.num_slots):
+        if model.slot_day[slot] == day:
+            day_slots |= 1 << slot
+    search = ForwardCheckingSearch(model, occupancy, freed, value_order='random', seed=seed,
+                                   slots=day_slots, node_limit=NEIGHBOURHOOD_NODE_LIMIT, scorer=soft,
+                                   deadline=deadline)
+
+    # The search keeps soft in step with its placements, so each solution's cost is already there
+    remaining = soft.total
+    best_gain = 1e-9
+    best = None
+    for assignment in search.solutions():
+        gain = -current - (soft.total - remaining)
+        if gain > best_gain:
+            best_gain = gain
+            best = dict(assignment)
+    return None if best is None else (best_gain, best)
+
+
+class LargeNeighbourhoodSearch:
+    """Improve a complete schedule by freeing small regions and re-solving them exactly.
+
+    A neighbourhood is a handful of sessions on one day: sessions of that day, of one
+    department's courses that day, or held in one room that day. Its sessions may move
+    anywhere on the same day while the rest of the schedule stays fixed. Because
+    neighbourhoods on different days never interact, one neighbourhood per day is
+    re-solved in parallel each round and all their improvements are applied together.
+    """
+
+    def __init__(self, model, occupancy, schedule, workers=1, seed=None):
+        self.model = model
+        self.occupancy = occupancy  # Must already hold every placement in schedule
+        self.schedule = dict(schedule)
+        self.workers = workers
+        self.random = random.Random(seed)
+        self.soft = SoftConstraints(model)
+        for session, (slot, room) in self.schedule.items():
+            self.soft.add(session, slot, room)
+
+        self.rounds = 0
+        self.tried = 0
+        self.improved = 0
+
+    def improve(self, time_budget):
+        """Run rounds of neighbourhood re-solves for time_budget seconds and return the schedule
+
+        The budget includes starting the worker pool: every worker's search stops at the
+        same deadline, and re-solves still running when it passes are given up, their
+        workers left to exit on their own rather than waited for.
+        """
+        initial = self.soft.total
+        days = sorted(set(self.model.slot_day[slot] for slot, _ in self.schedule.values()))
+        if not days:
+            return self.schedule
+
+        deadline = time.monotonic() + time_budget
+        context = multiprocessing.get_context('spawn')  # Never fork a process holding a Mongo client
+        pool = ProcessPoolExecutor(max_workers=min(self.workers, len(days)), mp_context=context,
+                                   initializer=_init_worker,
+                                   initargs=(self.model, self.occupancy.max_sessions_per_teacher_per_day))
+        try:
+            while deadline - time.monotonic() >= MIN_ROUND_SECONDS:
+                self.rounds += 1
+                futures = []
+                for day in days:
+                    placements = {s: p for s, p in self.schedule.items() if self.model.slot_day[p[0]] == day}
+                    freed = self._neighbourhood(placements)
+                    if freed:
+                        futures.append(pool.submit(_resolve_neighbourhood, day, placements, freed,
+                                                   self.random.randrange(1 << 30), deadline))
+                self.tried += len(futures)
+                done, late = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+                for future in futures:
+                    result = future.result() if future in done else None
+                    if result is not None:
+                        self._apply(result[1])
+                        self.improved += 1
+                if late:
+                    logger.info(f"Large neighbourhood search gave up {len(late)} re-solves at its time budget.")
+                    break
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        logger.info(f"Large neighbourhood search re-solved {self.tried} neighbourhoods in {self.rounds} rounds, "
+                    f"improved {self.improved} and lowered the soft cost from {initial:.1f} to {self.soft.total:.1f}.")
+        return self.schedule
+
+    def _neighbourhood(self, placements):
+        """Pick the sessions to free among one day's placements"""
+        model = self.model
+        sessions = list(placements)
+        if not sessions:
+            return sessions
+        kind = self.random.choice(NEIGHBOURHOODS)
+        if kind == 'department':
+            department = model.teacher_departments[model.session_teacher[self.random.choice(sessions)]]
+            sessions = [s for s in sessions if model.teacher_departments[model.session_teacher[s]] == department]
+        elif kind == 'room':
+            room = placements[self.random.choice(sessions)][1]
+            sessions = [s for s in sessions if placements[s][1] == room]
+        if len(sessions) > MAX_NEIGHBOURHOOD:
+            sessions = self.random.sample(sessions, MAX_NEIGHBOURHOOD)
+        return sessions
+
+    def _apply(self, assignment):
+        """Move the re-solved sessions to their new placements"""
+        for session in assignment:
+            slot, room = self.schedule[session]
+            self.occupancy.unassign(session, slot, room)
+            self.soft.remove(session, slot, room)
+        for session, (slot, room) in assignment.items():
+            self.schedule[session] = (slot, room)
+            self.occupancy.assign(session, slot, room)
+            self.soft.add(session, slot, room)
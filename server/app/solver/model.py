@@ -0,0 +1,183 @@
+from ..models import Teacher, Student, TimeSlot
+from ..utils.reference_cache import reference_data
+from .conflicts import build_conflict_matrix
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ProblemModel:
+    """Integer-indexed, database-free snapshot of everything the scheduler needs.
+
+    Rooms, time slots, courses, teachers and students are each numbered 0..n-1
+    and every relation between them is stored as plain lists of those indices,
+    so the search never touches mongoengine documents.
+    """
+
+    DAYS = TimeSlot.DAYS
+
+    def __init__(self):
+        # Rooms
+        self.room_ids = []  # Mongo _id per room index
+        self.room_codes = []  # Human readable room_id per room index
+        self.room_capacity = []
+
+        # Time slots, ordered by (day, start_time)
+        self.slot_ids = []
+        self.slot_codes = []
+        self.slot_day = []  # Index into DAYS
+        self.slot_start = []
+        self.slot_end = []
+
+        # Courses
+        self.course_ids = []
+        self.course_codes = []
+        self.course_names = []
+        self.course_hours = []  # lecture_hours
+        self.course_teacher = []  # Teacher index, or -1 if nobody can teach it
+        self.course_students = []  # Student indices enrolled in each course
+
+        # Teachers
+        self.teacher_ids = []
+        self.teacher_codes = []  # Human readable teacher_id per teacher index
+        self.teacher_names = []
+        self.teacher_departments = []
+        self.teacher_course_count = []  # len(teachable_courses)
+
+        # Students
+        self.student_ids = []
+        self.student_codes = []  # Human readable student_id per student index
+        self.student_names = []
+        self.student_courses = []  # Course indices each student is enrolled in
+
+        # Course-to-course student conflicts (see app.solver.conflicts)
+        self.conflicts = None
+
+        # Sessions to place: parallel arrays indexed by session number
+        self.session_course = []
+        self.session_teacher = []
+        self.session_number = []  # 1-based session number within its course
+
+        # Reverse lookups from Mongo _id to index
+        self.room_index = {}
+        self.slot_index = {}
+        self.course_index = {}
+        self.teacher_index = {}
+
+    @property
+    def num_rooms(self):
+        return len(self.room_ids)
+
+    @property
+    def num_slots(self):
+        return len(self.slot_ids)
+
+    @property
+    def num_courses(self):
+        return len(self.course_ids)
+
+    @property
+    def num_teachers(self):
+        return len(self.teacher_ids)
+
+    @property
+    def num_sessions(self):
+        return len(self.session_course)
+
+    def course_enrollment(self, course):
+        """Number of students enrolled in a course"""
+        return len(self.course_students[course])
+
+    def room_fits(self, course, room):
+        """Check if a room is large enough for every student of a course"""
+        return self.room_capacity[room] >= len(self.course_students[course])
+
+    def describe_session(self, session):
+        """Short label such as 'CS101 (2)' for logs and reports"""
+        return f"{self.course_codes[self.session_course[session]]} ({self.session_number[session]})"
+
+
+def compile_problem():
+    """Load the scheduling data from MongoDB once and compile it into a ProblemModel
+
+    Rooms, time slots and courses come from the process-wide reference cache.
+    """
+    model = ProblemModel()
+    reference_data.refresh()  # A run must see every room, slot and course written before it started
+
+    # Load rooms
+    for room in reference_data.rooms():
+        model.room_index[room['_id']] = len(model.room_ids)
+        model.room_ids.append(room['_id'])
+        model.room_codes.append(room['room_id'])
+        model.room_capacity.append(room['capacity'])
+
+    # Load time slots in chronological order
+    day_order = {day: i for i, day in enumerate(ProblemModel.DAYS)}
+    slots = sorted((slot for slot in reference_data.time_slots() if not slot.get('is_break', False)),
+                   key=lambda s: (day_order[s['day']], s['start_time']))
+    for slot in slots:
+        model.slot_index[slot['_id']] = len(model.slot_ids)
+        model.slot_ids.append(slot['_id'])
+        model.slot_codes.append(slot['slot_id'])
+        model.slot_day.append(day_order[slot['day']])
+        model.slot_start.append(slot['start_time'])
+        model.slot_end.append(slot['end_time'])
+
+    # Load courses
+    for course in reference_data.courses():
+        model.course_index[course['_id']] = len(model.course_ids)
+        model.course_ids.append(course['_id'])
+        model.course_codes.append(course['course_code'])
+        model.course_names.append(course['name'])
+        model.course_hours.append(course['lecture_hours'])
+        model.course_teacher.append(-1)
+        model.course_students.append([])
+
+    # Load teachers; the first qualified teacher (natural order) takes the course
+    for teacher in Teacher.objects.only('teacher_id', 'name', 'department', 'teachable_courses').as_pymongo():
+        t = len(model.teacher_ids)
+        model.teacher_index[teacher['_id']] = t
+        model.teacher_ids.append(teacher['_id'])
+        model.teacher_codes.append(teacher['teacher_id'])
+        model.teacher_names.append(teacher['name'])
+        model.teacher_departments.append(teacher['department'])
+        teachable = teacher.get('teachable_courses', [])
+        model.teacher_course_count.append(len(teachable))
+        for course_id in teachable:
+            c = model.course_index.get(course_id)
+            if c is not None and model.course_teacher[c] == -1:
+                model.course_teacher[c] = t
+
+    # Load enrollments
+    for student in Student.objects.only('student_id', 'name', 'enrolled_courses').as_pymongo():
+        s = len(model.student_ids)
+        model.student_ids.append(student['_id'])
+        model.student_codes.append(student['student_id'])
+        model.student_names.append(student['name'])
+        courses = []
+        for course_id in student.get('enrolled_courses', []):
+            c = model.course_index.get(course_id)
+            if c is not None and c not in courses:
+                courses.append(c)
+                model.course_students[c].append(s)
+        model.student_courses.append(courses)
+
+    model.conflicts = build_conflict_matrix(model.student_courses, model.num_courses)
+
+    # Create a node for each lecture hour of every course that has a teacher
+    for c, course_code in enumerate(model.course_codes):
+        teacher = model.course_teacher[c]
+        if teacher == -1:
+            logger.warning(f"No qualified teacher found for {course_code}. Skipping.")
+            continue
+        for session_num in range(1, model.course_hours[c] + 1):
+            model.session_course.append(c)
+            model.session_teacher.append(teacher)
+            model.session_number.append(session_num)
+
+    logger.info(f"Compiled {model.num_rooms} rooms, {model.num_slots} time slots, "
+                f"{model.num_courses} courses, {len(model.student_ids)} students "
+                f"and {model.num_sessions} sessions to schedule.")
+    return model
@@ -0,0 +1,73 @@
+class OccupancyIndex:
+    """Incremental record of what is already placed, so every hard constraint is an O(1) check.
+
+    assign() and unassign() are exact inverses, which lets a backtracking search
+    update the index on the way down and undo it on the way back up.
+    """
+
+    def __init__(self, model, max_sessions_per_teacher_per_day):
+        self.model = model
+        self.max_sessions_per_teacher_per_day = max_sessions_per_teacher_per_day
+
+        # Bit r of room_busy[slot] is set when room r is taken in that slot
+        self.room_busy = [0] * model.num_slots
+        # Teachers already teaching in each slot
+        self.teacher_busy = [set() for _ in range(model.num_slots)]
+        # Sessions per teacher per day, indexed [teacher][day]
+        self.teacher_day_count = [[0] * len(model.DAYS) for _ in range(model.num_teachers)]
+        # Reference-counted union of the courses that clash with something placed in each slot:
+        # slot_conflicts[slot][c] > 0 means course c shares a student with a session in that slot
+        self.slot_conflicts = [[0] * model.num_courses for _ in range(model.num_slots)]
+
+    def reserve_room(self, slot, room):
+        """Mark a room taken in a slot for a session that was assigned without one"""
+        self.room_busy[slot] |= 1 << room
+
+    def room_free(self, slot, room):
+        return not (self.room_busy[slot] >> room) & 1
+
+    def teacher_free(self, slot, teacher):
+        return teacher not in self.teacher_busy[slot]
+
+    def under_daily_limit(self, teacher, day):
+        return self.teacher_day_count[teacher][day] < self.max_sessions_per_teacher_per_day
+
+    def students_free(self, slot, course):
+        return self.slot_conflicts[slot][course] == 0
+
+    def can_assign(self, session, slot, room):
+        """Check every hard constraint for placing a session in (slot, room)"""
+        model = self.model
+        course = model.session_course[session]
+        teacher = model.session_teacher[session]
+        return (model.room_fits(course, room)
+                and self.room_free(slot, room)
+                and self.teacher_free(slot, teacher)
+                and self.students_free(slot, course)
+                and self.under_daily_limit(teacher, model.slot_day[slot]))
+
+    def assign(self, session, slot, room):
+        """Record a session as placed in (slot, room); room may be None if it is chosen later"""
+        model = self.model
+        course = model.session_course[session]
+        teacher = model.session_teacher[session]
+        if room is not None:
+            self.room_busy[slot] |= 1 << room
+        self.teacher_busy[slot].add(teacher)
+        self.teacher_day_count[teacher][model.slot_day[slot]] += 1
+        counts = self.slot_conflicts[slot]
+        for other in model.conflicts.neighbours(course):
+            counts[other] += 1
+
+    def unassign(self, session, slot, room):
+        """Undo a previous assign() of the same session"""
+        model = self.model
+        course = model.session_course[session]
+        teacher = model.session_teacher[session]
+        if room is not None:
+            self.room_busy[slot] &= ~(1 << room)
+        self.teacher_busy[slot].discard(teacher)
+        self.teacher_day_count[teacher][model.slot_day[slot]] -= 1
+        counts = self.slot_conflicts[slot]
+        for other in model.conflicts.neighbours(course):
+            counts[other] -= 1
@@ -0,0 +1,88 @@
+import logging
+from .rooms import match_rooms
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def complete_partial(model, occupancy, partial, sessions):
+    """Turn the best partial assignment of a stopped search into the largest schedule we can
+
+    partial maps sessions to (slot, room), where room may be None if the search deferred
+    rooms; those get rooms by a per-slot maximum matching. Every session still unplaced
+    is then put in its first feasible (slot, room), in the given order.
+
+    Returns:
+        (schedule, unplaced): the consistent partial schedule, also recorded in occupancy,
+        and the sessions left out
+    """
+    schedule = {}
+    by_slot = {}
+    for session, (slot, room) in partial.items():
+        if room is None:
+            by_slot.setdefault(slot, []).append(session)
+        else:
+            schedule[session] = (slot, room)
+            occupancy.assign(session, slot, room)
+    for slot, waiting in by_slot.items():
+        rooms = match_rooms(model, waiting, occupancy.room_busy[slot], partial=True)
+        for session, room in rooms.items():
+            schedule[session] = (slot, room)
+            occupancy.assign(session, slot, room)
+
+    unplaced = []
+    for session in sessions:
+        if session in schedule:
+            continue
+        placement = next(((slot, room) for slot in range(model.num_slots) for room in range(model.num_rooms)
+                          if occupancy.can_assign(session, slot, room)), None)
+        if placement is None:
+            unplaced.append(session)
+        else:
+            schedule[session] = placement
+            occupancy.assign(session, *placement)
+
+    logger.info(f"Partial schedule places {len(schedule)} sessions ({len(partial)} from the search); "
+                f"{len(unplaced)} could not be placed.")
+    return schedule, unplaced
+
+
+def blocking_constraints(model, occupancy, schedule, session):
+    """Explain why a session fits nowhere in the current schedule
+
+    Counts, over all time slots, how many are ruled out by each hard constraint
+    (a slot can be ruled out by several), and names the placed courses that share
+    students with it in the slots it would otherwise have fitted.
+    """
+    course = model.session_course[session]
+    teacher = model.session_teacher[session]
+    fitting = [room for room in range(model.num_rooms) if model.room_fits(course, room)]
+
+    # Which placed courses are in each slot, to name the student clashes
+    courses_in_slot = {}
+    for other, (slot, _) in schedule.items():
+        courses_in_slot.setdefault(slot, set()).add(model.session_course[other])
+
+    blocked = {'no_free_room': 0, 'teacher_busy': 0, 'student_conflict': 0, 'teacher_daily_limit': 0}
+    clashing = set()
+    for slot in range(model.num_slots):
+        if not any(occupancy.room_free(slot, room) for room in fitting):
+            blocked['no_free_room'] += 1
+        if not occupancy.teacher_free(slot, teacher):
+            blocked['teacher_busy'] += 1
+        if not occupancy.under_daily_limit(teacher, model.slot_day[slot]):
+            blocked['teacher_daily_limit'] += 1
+        if not occupancy.students_free(slot, course):
+            blocked['student_conflict'] += 1
+            clashing.update(c for c in courses_in_slot.get(slot, ()) if model.conflicts.conflicts(course, c))
+
+    return {
+        'course_code': model.course_codes[course],
+        'course_name': model.course_names[course],
+        'session_number': model.session_number[session],
+        'teacher': model.teacher_names[teacher],
+        'enrolled_students': model.course_enrollment(course),
+        'fits_no_room': not fitting,
+        'blocked_slots': blocked,
+        'conflicting_courses': sorted(model.course_codes[c] for c in clashing),
+    }
@@ -0,0 +1,98 @@
+import multiprocessing
+import queue
+import time
+import logging
+from .occupancy import OccupancyIndex
+from .search import ForwardCheckingSearch
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Search settings handed out to portfolio workers in turn; every worker also gets its own seed
+PORTFOLIO = (
+    {'static_order': True},
+    {'defer_rooms': True, 'backjumping': True},
+    {'value_order': 'random'},
+    {'defer_rooms': True, 'value_order': 'random'},
+    {'backjumping': True, 'value_order': 'last'},
+    {'defer_rooms': True, 'backjumping': True, 'value_order': 'random'},
+)
+
+# Seconds between checks that the workers are still alive
+POLL_INTERVAL = 1.0
+
+
+def portfolio_configs(workers, seed=0):
+    """Search keyword arguments for each of the given number of workers"""
+    return [dict(PORTFOLIO[i % len(PORTFOLIO)], seed=seed + i) for i in range(workers)]
+
+
+def _run_worker(tasks, results):
+    """Take one search to run from tasks and report (index, assignment or None, SearchCounters) back"""
+    index, model, max_sessions_per_teacher_per_day, sessions, config, preferred = tasks.get()
+    occupancy = OccupancyIndex(model, max_sessions_per_teacher_per_day)
+    search = ForwardCheckingSearch(model, occupancy, sessions, preferred=preferred, **config)
+    success = search.solve()
+    results.put((index, search.assignment if success else None, search.counters()))
+
+
+def solve_portfolio(model, occupancy, sessions, workers, time_budget=None, seed=0, preferred=None):
+    """Race differently configured searches on the same model; the first schedule wins
+
+    Backtracking run times are heavy-tailed, so several diversified runs usually finish
+    far sooner than any single one. Each worker is a separate process; as soon as one
+    returns a schedule, or the time budget (seconds, None for no limit) runs out, the
+    rest are terminated. Every worker tries the preferred placements first, if given.
+
+    Returns:
+        (schedule, winner): a dict session -> (slot, room), or None if every worker failed
+        or time ran out, and the winning worker's (index, config, SearchCounters) or None
+    """
+    context = multiprocessing.get_context('spawn')  # Never fork a process holding a Mongo client
+    tasks = context.Queue()
+    results = context.Queue()
+    configs = portfolio_configs(workers, seed)
+    # The model goes through a queue rather than the process arguments, so the workers start
+    # (and import the app) side by side instead of one after another
+    processes = [context.Process(target=_run_worker, args=(tasks, results), daemon=True) for _ in configs]
+    for process in processes:
+        process.start()
+    for i, config in enumerate(configs):
+        tasks.put((i, model, occupancy.max_sessions_per_teacher_per_day, sessions, config, preferred))
+
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    schedule = None
+    winner = None
+    pending = len(processes)
+    try:
+        while pending and schedule is None:
+            timeout = POLL_INTERVAL if deadline is None else min(POLL_INTERVAL, deadline - time.monotonic())
+            if timeout <= 0:
+                logger.info(f"Portfolio time budget of {time_budget}s ran out.")
+                break
+            try:
+                index, assignment, counters = results.get(timeout=timeout)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes) and results.empty():
+                    logger.error("Portfolio workers exited without reporting a result.")
+                    break
+                continue
+            pending -= 1
+            if assignment is None:
+                logger.info(f"Portfolio worker {index} {configs[index]} found no schedule after "
+                            f"{counters.nodes} nodes.")
+            else:
+                logger.info(f"Portfolio worker {index} {configs[index]} won after {counters.nodes} nodes.")
+                schedule = assignment
+                winner = (index, configs[index], counters)
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join()
+
+    if schedule is not None:
+        for session, (slot, room) in schedule.items():
+            occupancy.assign(session, slot, room)
+    return schedule, winner
@@ -0,0 +1,70 @@
+import logging
+from .search import ForwardCheckingSearch
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def repair_schedule(model, occupancy, previous, backjumping=False):
+    """Bring a stored schedule back in line with the current data, moving as little as possible
+
+    previous maps sessions to the (slot, room) they held, for every stored placement
+    that still refers to an existing course session, slot and room. Placements are
+    kept greedily, largest classes first, as long as they break no hard constraint;
+    the sessions left over (displaced or new) are then placed around them. If that
+    fails, sessions sharing a teacher or students with the leftovers are freed as
+    well, and as a last resort the whole schedule is rebuilt.
+
+    Returns:
+        (schedule, moved) where moved is the set of sessions whose placement changed
+        or is new, or None if no schedule exists. occupancy ends up holding schedule.
+    """
+    order = sorted(previous, key=lambda s: model.course_enrollment(model.session_course[s]), reverse=True)
+    kept = {}
+    for session in order:
+        slot, room = previous[session]
+        if occupancy.can_assign(session, slot, room):
+            occupancy.assign(session, slot, room)
+            kept[session] = (slot, room)
+    unplaced = [s for s in range(model.num_sessions) if s not in kept]
+    logger.info(f"Kept {len(kept)} of {len(previous)} stored placements; {len(unplaced)} sessions need a place.")
+
+    schedule = _place_around(model, occupancy, kept, unplaced, backjumping)
+    if schedule is None and unplaced:
+        # Free everything the leftovers interact with through a teacher or shared students
+        courses = set(model.session_course[s] for s in unplaced)
+        teachers = set(model.session_teacher[s] for s in unplaced)
+        related = [s for s in kept
+                   if model.session_teacher[s] in teachers
+                   or any(model.conflicts.conflicts(model.session_course[s], c) for c in courses)]
+        logger.info(f"Repair needs more room; also freeing {len(related)} related sessions.")
+        schedule = _place_around(model, occupancy, kept, unplaced + _release(occupancy, kept, related),
+                                 backjumping)
+    if schedule is None:
+        logger.info("No repair found; rebuilding the whole schedule.")
+        schedule = _place_around(model, occupancy, kept, list(range(model.num_sessions)), backjumping,
+                                 release=list(kept))
+    if schedule is None:
+        return None
+
+    moved = set(s for s, placement in schedule.items() if previous.get(s) != placement)
+    return schedule, moved
+
+
+def _release(occupancy, kept, sessions):
+    """Take sessions out of the kept placements and the occupancy index"""
+    for session in sessions:
+        slot, room = kept.pop(session)
+        occupancy.unassign(session, slot, room)
+    return sessions
+
+
+def _place_around(model, occupancy, kept, sessions, backjumping, release=()):
+    """Place sessions around the kept placements; returns the full schedule or None"""
+    _release(occupancy, kept, release)
+    search = ForwardCheckingSearch(model, occupancy, sessions, backjumping=backjumping)
+    if not search.solve():
+        return None
+    schedule = dict(kept)
+    schedule.update(search.assignment)
+    return schedule
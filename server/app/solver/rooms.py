@@ -0,0 +1,99 @@
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SlotCapacityBound:
+    """Per-slot check that the sessions placed in a slot can still get distinct rooms.
+
+    A room suits a course whenever its capacity covers the enrolment, so the rooms
+    usable by a course are exactly those at or above some capacity threshold. For
+    such nested sets Hall's condition reduces to: for every distinct capacity c,
+    the sessions needing at least c must not outnumber the free rooms holding at
+    least c. slack[slot][j] tracks that margin for the j-th smallest capacity.
+    """
+
+    def __init__(self, model, occupancy):
+        self.model = model
+        self.capacities = sorted(set(model.room_capacity))
+
+        # Smallest capacity class that holds each course, -1 if no room is big enough
+        self.course_class = []
+        for course in range(model.num_courses):
+            enrolled = model.course_enrollment(course)
+            fitting = [j for j, cap in enumerate(self.capacities) if cap >= enrolled]
+            self.course_class.append(fitting[0] if fitting else -1)
+
+        # Free rooms of at least each capacity, per slot (rooms already taken do not count)
+        self.slack = []
+        for slot in range(model.num_slots):
+            busy = occupancy.room_busy[slot]
+            self.slack.append([
+                sum(1 for room, room_cap in enumerate(model.room_capacity)
+                    if room_cap >= cap and not (busy >> room) & 1)
+                for cap in self.capacities
+            ])
+
+    def can_host(self, slot, course):
+        """Check if one more session of the course still leaves the slot matchable"""
+        level = self.course_class[course]
+        if level < 0:
+            return False
+        slack = self.slack[slot]
+        for j in range(level + 1):
+            if slack[j] < 1:
+                return False
+        return True
+
+    def add(self, slot, course):
+        slack = self.slack[slot]
+        for j in range(self.course_class[course] + 1):
+            slack[j] -= 1
+
+    def remove(self, slot, course):
+        slack = self.slack[slot]
+        for j in range(self.course_class[course] + 1):
+            slack[j] += 1
+
+
+def match_rooms(model, sessions, busy=0, preferred=None, partial=False):
+    """Assign distinct, large enough rooms to sessions that share a time slot
+
+    Uses augmenting paths (Kuhn's algorithm) on the bipartite graph of sessions
+    and the rooms not set in the busy bitmask. Sessions are matched largest
+    enrolment first and try rooms smallest first, so big rooms stay free for
+    big classes. A session's room in preferred (session -> room) is tried first.
+
+    Returns:
+        A dict session -> room, or None if no complete matching exists. With
+        partial=True a maximum matching is returned even if some sessions miss out.
+    """
+    rooms = sorted((r for r in range(model.num_rooms) if not (busy >> r) & 1),
+                   key=lambda r: model.room_capacity[r])
+    candidates = {
+        session: [r for r in rooms if model.room_fits(model.session_course[session], r)]
+        for session in sessions
+    }
+    for session, room in (preferred or {}).items():
+        if room in candidates.get(session, ()):
+            candidates[session].remove(room)
+            candidates[session].insert(0, room)
+    room_owner = {}  # room -> session
+
+    def augment(session, visited):
+        for room in candidates[session]:
+            if room in visited:
+                continue
+            visited.add(room)
+            if room not in room_owner or augment(room_owner[room], visited):
+                room_owner[room] = session
+                return True
+        return False
+
+    order = sorted(sessions, key=lambda s: model.course_enrollment(model.session_course[s]), reverse=True)
+    for session in order:
+        if not augment(session, set()) and not partial:
+            return None
+
+    return {session: room for room, session in room_owner.items()}
@@ -0,0 +1,605 @@
+from .rooms import SlotCapacityBound, match_rooms
+from collections import namedtuple
+import logging
+import random
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Learned nogoods are kept only while small and few, so checking them stays cheap
+MAX_NOGOODS = 10000
+MAX_NOGOOD_SIZE = 8
+
+# Order in which a session's candidate slots are tried: earliest first, latest first, or shuffled
+VALUE_ORDERS = ('first', 'last', 'random')
+
+# The counters RunStats.add_search() reads, as a search in a worker process sends them back
+SearchCounters = namedtuple('SearchCounters', ('nodes', 'backtracks', 'max_depth', 'checks'))
+
+
+def iter_bits(mask):
+    """Yield the indices of the set bits of mask in ascending order"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class ForwardCheckingSearch:
+    """Backtracking search with dynamic variable ordering and forward checking.
+
+    Every unplaced session keeps a live domain: a bitmask of the time slots it
+    could still take given everything placed so far. The next session to place
+    is always the one with the fewest remaining slots (minimum remaining values,
+    i.e. DSATUR's saturation degree), ties broken by how many other sessions it
+    constrains. Each placement prunes the domains of the sessions it clashes
+    with, and an emptied domain fails the placement before recursing.
+
+    With backjumping=True a failure jumps straight back to the deepest placement
+    that actually caused it (conflict-directed backjumping) instead of the previous
+    one, and the set of placements blamed is cached as a nogood so the same partial
+    conflict is never explored again.
+
+    With static_order=True sessions are placed in the given order instead, with
+    slots and rooms tried by index, exactly like SchedulerController's original
+    recursive backtracker; forward checking only skips values that backtracker
+    would have rejected further down, so with symmetry breaking off both find
+    the same first schedule.
+
+    With symmetry_breaking=True (the default) interchangeable choices are only
+    explored once: session k+1 of a course must take a later slot than session k,
+    and within a slot only one room of each capacity is tried.
+
+    The search itself runs on an explicit stack with preallocated per-depth and
+    undo-log arrays, so thousands of sessions neither hit Python's recursion
+    limit nor allocate on every node.
+
+    With defer_rooms=True the search is two-phase: it colours sessions with time
+    slots only, guarded by a per-slot room-capacity bound, and afterwards gives
+    each slot's sessions rooms through a bipartite matching. Rooms then no longer
+    multiply the branching factor.
+
+    value_order picks how slots are tried (see VALUE_ORDERS), and a seed breaks
+    ties between equally constrained sessions at random, so that differently
+    seeded runs explore different parts of the search space.
+
+    slots limits the sessions to a bitmask of time slots, and node_limit stops the
+    search (undoing everything it placed) after that many nodes. A deadline (a
+    time.monotonic() value) stops it the same way once passed, and the deepest
+    consistent partial schedule reached is then left in best_partial. A scorer, any object
+    with add() and remove() taking (session, slot, room) such as SoftConstraints, is
+    kept in step with every placement, so solutions() can read off each schedule's cost.
+
+    preferred maps sessions to a (slot, room) to try before anything else, such as
+    their place in the previous schedule, so a re-run mostly confirms old placements.
+    """
+
+    def __init__(self, model, occupancy, sessions=None, defer_rooms=False, backjumping=False, static_order=False,
+                 symmetry_breaking=True, value_order='first', seed=None, slots=None, node_limit=None,
+                 scorer=None, preferred=None, deadline=None):
+        if value_order not in VALUE_ORDERS:
+            raise ValueError(f"Unknown value order '{value_order}'. Choose from {', '.join(VALUE_ORDERS)}.")
+        self.model = model
+        self.occupancy = occupancy
+        self.sessions = list(range(model.num_sessions)) if sessions is None else list(sessions)
+        self.defer_rooms = defer_rooms
+        self.capacity = SlotCapacityBound(model, occupancy) if defer_rooms else None
+        self.backjumping = backjumping
+        self.static_order = static_order
+        self.symmetry_breaking = symmetry_breaking
+        self.value_order = value_order
+        self.random = random.Random(seed)
+        self.allowed_slots = (1 << model.num_slots) - 1 if slots is None else slots
+        self.node_limit = node_limit
+        self.deadline = deadline
+        self.timed_out = False
+        self.best_partial = {}  # Deepest assignment seen, only kept when there is a deadline
+        self.scorer = scorer
+        self.preferred = preferred or {}
+
+        self.assignment = {}  # session -> (slot, room)
+        self.placed = [False] * model.num_sessions
+        self.domains = [0] * model.num_sessions  # Bitmask of feasible slots per session
+
+        # Undo log of domain changes, preallocated as flat arrays. Every entry removes at least one
+        # slot from a session's domain on the current branch, so it can never outgrow sessions x slots.
+        trail_size = len(self.sessions) * model.num_slots + 1
+        self.trail_session = [0] * trail_size
+        self.trail_domain = [0] * trail_size
+        self.trail_pruned_by = [0] * trail_size
+        self.trail_length = 0
+
+        # Explicit search stack, one entry per depth
+        depth_count = len(self.sessions) + 1
+        self.order = [None] * depth_count  # Session placed at each depth
+        self.depth_of = [-1] * model.num_sessions
+        self.candidates = [0] * depth_count  # Slots not yet tried at each depth
+        self.scan_slot = [-1] * depth_count  # Slot whose rooms are being tried at each depth
+        self.scan_rooms = [0] * depth_count  # Free fitting rooms of scan_slot not yet tried
+        self.room_cursor = [0] * depth_count  # Position in room_order for scan_rooms
+        self.current = [None] * depth_count  # (slot, room) placed at each depth, None if nothing is
+        self.mark = [0] * depth_count  # Trail length before the placement at each depth
+        self.warm_pending = [False] * depth_count  # Preferred placement not yet tried at each depth
+        self.warm_slot = [-1] * depth_count  # Slot whose preferred room (class) was already tried
+        self.warm_rooms = [0] * depth_count  # Rooms of warm_slot the scan must skip
+
+        # Conflict-directed backjumping bookkeeping; sets of search depths are stored as bitmasks
+        self.pruned_by = [0] * model.num_sessions  # Depths whose placements pruned each session's domain
+        self.conflict_set = [0] * depth_count  # Depths blamed for failures below each depth
+        self.slot_depths = [0] * model.num_slots  # Depths of the placements in each slot
+        self.teacher_day_depths = {}  # (teacher, day) -> depths of that teacher's placements that day
+        self.jump_to = -1  # Depth a failed subtree asks its ancestors to resume from
+        self.wiped_out = None  # Session whose domain the last forward check emptied
+
+        # Learned nogoods: sets of (session, slot, room) placements that cannot all hold together
+        self.nogoods = {}  # placement -> list of nogoods containing it
+        self.nogood_count = 0
+
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        # Forward-checking tests of each hard constraint against unplaced sessions' slots
+        self.checks = {name: {'passed': 0, 'failed': 0} for name in ('room', 'teacher', 'students', 'daily_limit')}
+        self.backjumps = 0
+        self.nogood_hits = 0
+        self.nodes_saved = 0  # Lower bound on values chronological backtracking would have tried
+
+        # Rooms that can hold each course, and rooms in best-fit (smallest first) order
+        self.fit_mask = [0] * model.num_courses
+        for course in range(model.num_courses):
+            for room in range(model.num_rooms):
+                if model.room_fits(course, room):
+                    self.fit_mask[course] |= 1 << room
+        self.rooms_by_capacity = sorted(range(model.num_rooms), key=lambda r: model.room_capacity[r])
+        # A static order replays SchedulerController._backtrack_schedule, which tries rooms by index
+        self.room_order = list(range(model.num_rooms)) if static_order else self.rooms_by_capacity
+        # Seeded runs break ties between equally constrained sessions at random
+        self.tie_break = [self.random.random() if seed is not None else 0 for _ in range(model.num_sessions)]
+
+        # Rooms sharing each room's capacity; they are interchangeable, so one of them stands for all
+        self.same_capacity = [0] * model.num_rooms
+        for room in range(model.num_rooms):
+            for other in range(model.num_rooms):
+                if model.room_capacity[other] == model.room_capacity[room]:
+                    self.same_capacity[room] |= 1 << other
+
+        # Slots belonging to each day, used when a teacher reaches the daily limit
+        self.day_mask = [0] * len(model.DAYS)
+        for slot in range(model.num_slots):
+            self.day_mask[model.slot_day[slot]] |= 1 << slot
+
+        # Static tie-break: courses sharing students plus other sessions of the same teacher
+        teacher_load = [0] * model.num_teachers
+        for session in self.sessions:
+            teacher_load[model.session_teacher[session]] += 1
+        self.degree = [model.conflicts.degree(model.session_course[s]) + teacher_load[model.session_teacher[s]]
+                       for s in range(model.num_sessions)]
+
+    def solve(self):
+        """Place every session; return True on success with the result in self.assignment"""
+        if not self._initial_domains():
+            return False
+
+        success = self._search()
+        logger.info(f"Forward checking search expanded {self.nodes} nodes with {self.backtracks} backtracks.")
+        if not success and self.node_limit is not None and self.nodes >= self.node_limit:
+            logger.info(f"Search stopped at its limit of {self.node_limit} nodes.")
+        if self.timed_out:
+            logger.info(f"Search ran out of time with {len(self.best_partial)} of {len(self.sessions)} "
+                        f"sessions placed at best.")
+        if self.backjumping:
+            logger.info(f"Backjumping made {self.backjumps} jumps, learned {self.nogood_count} nogoods "
+                        f"({self.nogood_hits} hits) and saved at least {self.nodes_saved} nodes.")
+        if success and self.defer_rooms:
+            success = self._assign_rooms()
+        return success
+
+    def counters(self):
+        """This search's counters, picklable for returning from a worker process"""
+        return SearchCounters(self.nodes, self.backtracks, self.max_depth, self.checks)
+
+    def solutions(self):
+        """Yield self.assignment for every complete schedule the search reaches, in search order
+
+        The occupancy index holds each schedule while it is being looked at. Rooms must be
+        chosen by the search itself, so this does not combine with defer_rooms.
+        """
+        if self.defer_rooms:
+            raise ValueError("Enumerating solutions needs rooms chosen during the search.")
+        if not self._initial_domains():
+            return
+        resume = False
+        while self._search(resume):
+            yield self.assignment
+            resume = True
+
+    def _initial_domains(self):
+        """Load every session's starting domain; False if one of them is already empty"""
+        for session in self.sessions:
+            self.domains[session] = self._initial_domain(session)
+            if not self.domains[session]:
+                logger.info(f"{self.model.describe_session(session)} has no feasible time slot.")
+                return False
+        return True
+
+    def _assign_rooms(self):
+        """Second phase: match the sessions of every slot to distinct rooms"""
+        by_slot = {}
+        for session, (slot, _) in self.assignment.items():
+            by_slot.setdefault(slot, []).append(session)
+
+        for slot, sessions in by_slot.items():
+            preferred = {s: self.preferred[s][1] for s in sessions if s in self.preferred}
+            rooms = match_rooms(self.model, sessions, self.occupancy.room_busy[slot], preferred=preferred)
+            if rooms is None:
+                # Cannot happen while the capacity bound holds, but never return a partial result
+                logger.error(f"No room matching exists for time slot {self.model.slot_codes[slot]}.")
+                return False
+            for session, room in rooms.items():
+                self.assignment[session] = (slot, room)
+                self.occupancy.reserve_room(slot, room)
+        return True
+
+    def _slot_has_room(self, slot, course):
+        """Check if some room can still take a session of the course in a slot"""
+        if self.defer_rooms:
+            return self.capacity.can_host(slot, course)
+        return self.fit_mask[course] & ~self.occupancy.room_busy[slot] != 0
+
+    def _initial_domain(self, session):
+        """Slots where the session could go given what the occupancy index already holds"""
+        model = self.model
+        occupancy = self.occupancy
+        course = model.session_course[session]
+        teacher = model.session_teacher[session]
+        domain = 0
+        for slot in iter_bits(self.allowed_slots):
+            if (self._slot_has_room(slot, course)
+                    and occupancy.teacher_free(slot, teacher)
+                    and occupancy.students_free(slot, course)
+                    and occupancy.under_daily_limit(teacher, model.slot_day[slot])):
+                domain |= 1 << slot
+        return domain
+
+    def _select_session(self, depth):
+        """Pick the next session: the fixed order if static, else the smallest domain, then largest degree"""
+        if self.static_order:
+            return self.sessions[depth]
+        best = None
+        best_key = None
+        for session in self.sessions:
+            if self.placed[session]:
+                continue
+            key = (self.domains[session].bit_count(), -self.degree[session], self.tie_break[session])
+            if best_key is None or key < best_key:
+                best, best_key = session, key
+        return best
+
+    def _open_level(self, depth):
+        """Choose the session for a new depth and load its candidate slots"""
+        session = self._select_session(depth)
+        self.placed[session] = True
+        self.order[depth] = session
+        self.depth_of[session] = depth
+        self.candidates[depth] = self.domains[session]
+        self.scan_slot[depth] = -1
+        self.current[depth] = None
+        self.conflict_set[depth] = 0
+        self.warm_pending[depth] = session in self.preferred
+        self.warm_slot[depth] = -1
+
+    def _next_value(self, depth):
+        """Next untried (slot, room) for the session at depth, or None when exhausted
+
+        The preferred placement, if any, comes first. Then slots are tried in value_order
+        and, within a slot, free fitting rooms in room_order. Nothing here allocates per
+        node: progress lives in the stack arrays.
+        """
+        session = self.order[depth]
+        course = self.model.session_course[session]
+        while True:
+            if self.warm_pending[depth]:
+                self.warm_pending[depth] = False
+                value = self._preferred_value(depth, session, course)
+                if value is None:
+                    continue
+                slot, room = value
+            elif self.defer_rooms or self.scan_rooms[depth] == 0 or self.scan_slot[depth] < 0:
+                candidates = self.candidates[depth]
+                if not candidates:
+                    return None
+                slot = self._pick_slot(candidates)
+                self.candidates[depth] = candidates & ~(1 << slot)
+                if self.defer_rooms:
+                    room = None
+                else:
+                    self.scan_slot[depth] = slot
+                    self.scan_rooms[depth] = self.fit_mask[course] & ~self.occupancy.room_busy[slot]
+                    if slot == self.warm_slot[depth]:
+                        self.scan_rooms[depth] &= ~self.warm_rooms[depth]
+                    self.room_cursor[depth] = 0
+                    continue
+            else:
+                slot = self.scan_slot[depth]
+                rooms = self.scan_rooms[depth]
+                cursor = self.room_cursor[depth]
+                room = self.room_order[cursor]
+                while not (rooms >> room) & 1:
+                    cursor += 1
+                    room = self.room_order[cursor]
+                self.room_cursor[depth] = cursor + 1
+                if self.symmetry_breaking:
+                    self.scan_rooms[depth] = rooms & ~self.same_capacity[room]
+                else:
+                    self.scan_rooms[depth] = rooms & ~(1 << room)
+
+            if self.backjumping and self._violates_nogood(session, slot, room, depth):
+                continue
+            return slot, room
+
+    def _preferred_value(self, depth, session, course):
+        """The session's preferred (slot, room) if still open, taken out of the regular scan"""
+        slot, room = self.preferred[session]
+        if not (self.candidates[depth] >> slot) & 1:
+            return None
+        if self.defer_rooms:
+            self.candidates[depth] &= ~(1 << slot)
+            return slot, None
+        if not ((self.fit_mask[course] & ~self.occupancy.room_busy[slot]) >> room) & 1:
+            return None
+        self.warm_slot[depth] = slot
+        self.warm_rooms[depth] = self.same_capacity[room] if self.symmetry_breaking else 1 << room
+        return slot, room
+
+    def _pick_slot(self, candidates):
+        """Choose the next slot to try from a non-empty candidate bitmask"""
+        if self.value_order == 'first':
+            return (candidates & -candidates).bit_length() - 1
+        if self.value_order == 'last':
+            return candidates.bit_length() - 1
+        skip = self.random.randrange(candidates.bit_count())
+        for slot in iter_bits(candidates):
+            if not skip:
+                return slot
+            skip -= 1
+
+    def _search(self, resume=False):
+        """Depth-first search driven by an explicit stack instead of recursion
+
+        With resume=True it carries on from the complete schedule it last returned.
+        """
+        total = len(self.sessions)
+        if total == 0:
+            return not resume
+
+        if resume:
+            depth = total - 1
+            self.jump_to = depth  # Looking for another solution is not a failure to backjump from
+        else:
+            depth = 0
+            self._open_level(0)
+        steps = 0
+        while depth >= 0:
+            if self.node_limit is not None and self.nodes >= self.node_limit:
+                self._abandon(depth)
+                return False
+            steps += 1
+            if self.deadline is not None and steps & 255 == 0 and time.monotonic() >= self.deadline:
+                self.timed_out = True
+                self._abandon(depth)
+                return False
+            session = self.order[depth]
+
+            # Take back whatever is placed at this depth before moving on
+            if self.current[depth] is not None:
+                slot, room = self.current[depth]
+                self._undo(self.mark[depth])
+                self._unplace(session, slot, room, depth)
+                self.current[depth] = None
+                self.backtracks += 1
+
+                if self.backjumping and self.jump_to < depth:
+                    # The failure below does not involve this placement: keep unwinding
+                    self.placed[session] = False
+                    depth -= 1
+                    continue
+
+            value = self._next_value(depth)
+            if value is None:
+                # Every value failed: backtrack (or backjump) to an earlier depth
+                self.placed[session] = False
+                if self.backjumping:
+                    self._backjump(session, depth)
+                depth -= 1
+                continue
+
+            slot, room = value
+            self.nodes += 1
+            self.mark[depth] = self.trail_length
+            self._place(session, slot, room, depth)
+            self.current[depth] = value
+
+            if self._forward_check(session, slot, depth):
+                depth += 1
+                if depth > self.max_depth:
+                    self.max_depth = depth
+                if self.deadline is not None and depth > len(self.best_partial):
+                    self.best_partial = dict(self.assignment)
+                if depth == total:
+                    return True
+                self._open_level(depth)
+            elif self.backjumping:
+                # Blame whatever pruned the session that ran out of slots
+                self.conflict_set[depth] |= self.pruned_by[self.wiped_out] & ~(1 << depth)
+                self.jump_to = depth
+
+        return False
+
+    def _abandon(self, depth):
+        """Take back every placement from depth up to the root"""
+        for d in range(depth, -1, -1):
+            session = self.order[d]
+            if self.current[d] is not None:
+                slot, room = self.current[d]
+                self._undo(self.mark[d])
+                self._unplace(session, slot, room, d)
+                self.current[d] = None
+            self.placed[session] = False
+
+    def _backjump(self, session, depth):
+        """Work out where to resume after every value at depth failed, and learn a nogood"""
+        culprits = (self.conflict_set[depth] | self.pruned_by[session]) & ~(1 << depth)
+        target = culprits.bit_length() - 1  # Deepest culprit, -1 if the failure is unconditional
+        if target >= 0:
+            self.conflict_set[target] |= culprits & ~(1 << target)
+        if target < depth - 1:
+            self.backjumps += 1
+            # Chronological backtracking would have tried at least the slots left at each skipped depth
+            self.nodes_saved += sum(self.candidates[d].bit_count() for d in range(target + 1, depth))
+        if target >= 0 and (target < depth - 1 or culprits.bit_count() <= 2):
+            # A chronological failure blames the whole prefix, which will never recur; only keep
+            # nogoods that skipped levels or are small enough to prune other branches
+            self._learn_nogood(culprits)
+        self.jump_to = target
+
+    def _learn_nogood(self, culprits):
+        """Remember that the placements at the culprit depths can never all hold together"""
+        if self.nogood_count >= MAX_NOGOODS or culprits.bit_count() > MAX_NOGOOD_SIZE:
+            return
+        nogood = tuple((self.order[d],) + self.assignment[self.order[d]] for d in iter_bits(culprits))
+        for placement in nogood:
+            self.nogoods.setdefault(placement, []).append(nogood)
+        self.nogood_count += 1
+
+    def _violates_nogood(self, session, slot, room, depth):
+        """Check if placing the session would complete a learned nogood"""
+        for nogood in self.nogoods.get((session, slot, room), ()):
+            others = [p for p in nogood if p[0] != session]
+            if all(self.placed[s] and self.assignment.get(s) == (t, r) for s, t, r in others):
+                self.nogood_hits += 1
+                for s, _, _ in others:
+                    self.conflict_set[depth] |= 1 << self.depth_of[s]
+                return True
+        return False
+
+    def _place(self, session, slot, room, depth):
+        self.assignment[session] = (slot, room)
+        self.occupancy.assign(session, slot, room)
+        if self.defer_rooms:
+            self.capacity.add(slot, self.model.session_course[session])
+        if self.scorer is not None:
+            self.scorer.add(session, slot, room)
+        if self.backjumping:
+            key = (self.model.session_teacher[session], self.model.slot_day[slot])
+            self.slot_depths[slot] |= 1 << depth
+            self.teacher_day_depths[key] = self.teacher_day_depths.get(key, 0) | 1 << depth
+
+    def _unplace(self, session, slot, room, depth):
+        if self.backjumping:
+            key = (self.model.session_teacher[session], self.model.slot_day[slot])
+            self.slot_depths[slot] &= ~(1 << depth)
+            self.teacher_day_depths[key] &= ~(1 << depth)
+        if self.defer_rooms:
+            self.capacity.remove(slot, self.model.session_course[session])
+        if self.scorer is not None:
+            self.scorer.remove(session, slot, room)
+        self.occupancy.unassign(session, slot, room)
+        del self.assignment[session]
+
+    def _forward_check(self, session, slot, depth):
+        """Prune the domains of unplaced sessions after placing session in slot
+
+        Returns False as soon as some session is left without any feasible slot;
+        that session is left in self.wiped_out. With backjumping on, every pruned
+        session also records the depths of the placements responsible.
+        """
+        model = self.model
+        occupancy = self.occupancy
+        conflicts = model.conflicts
+        course = model.session_course[session]
+        teacher = model.session_teacher[session]
+        number = model.session_number[session]
+        bit = 1 << slot
+        this_depth = 1 << depth
+
+        # Once the teacher hits the daily limit, the rest of that day is gone for all their sessions
+        day = model.slot_day[slot]
+        day_full = not occupancy.under_daily_limit(teacher, day)
+        day_reason = self.teacher_day_depths.get((teacher, day), 0) if self.backjumping else 0
+        self.checks['daily_limit']['failed' if day_full else 'passed'] += 1
+
+        # Check counts stay in locals in the loop and are added up once at the end
+        teacher_passed = teacher_failed = students_passed = students_failed = room_passed = room_failed = 0
+        wiped_out = None
+        for other in self.sessions:
+            if self.placed[other]:
+                continue
+            domain = self.domains[other]
+            pruned = domain
+            reason = 0
+            other_course = model.session_course[other]
+
+            if model.session_teacher[other] == teacher:
+                if pruned & bit:
+                    teacher_failed += 1
+                pruned &= ~bit
+                reason = this_depth
+                if self.symmetry_breaking and model.session_course[other] == course:
+                    # Keep sessions of a course in session-number order across slots
+                    if model.session_number[other] > number:
+                        pruned &= ~((bit << 1) - 1)
+                    else:
+                        pruned &= bit - 1
+                if day_full and pruned & self.day_mask[day]:
+                    pruned &= ~self.day_mask[day]
+                    reason |= day_reason
+            elif pruned & bit:
+                teacher_passed += 1
+                if conflicts.conflicts(course, other_course):
+                    students_failed += 1
+                    pruned &= ~bit
+                    reason = this_depth
+                elif not self._slot_has_room(slot, other_course):
+                    students_passed += 1
+                    room_failed += 1
+                    # Every placement in this slot helped use up the rooms
+                    pruned &= ~bit
+                    reason = self.slot_depths[slot]
+                else:
+                    students_passed += 1
+                    room_passed += 1
+
+            if pruned != domain:
+                top = self.trail_length
+                self.trail_session[top] = other
+                self.trail_domain[top] = domain
+                self.trail_pruned_by[top] = self.pruned_by[other]
+                self.trail_length = top + 1
+                self.domains[other] = pruned
+                self.pruned_by[other] |= reason
+                if not pruned:
+                    wiped_out = other
+                    break
+
+        checks = self.checks
+        checks['teacher']['passed'] += teacher_passed
+        checks['teacher']['failed'] += teacher_failed
+        checks['students']['passed'] += students_passed
+        checks['students']['failed'] += students_failed
+        checks['room']['passed'] += room_passed
+        checks['room']['failed'] += room_failed
+        if wiped_out is not None:
+            self.wiped_out = wiped_out
+            return False
+        return True
+
+    def _undo(self, mark):
+        """Restore every domain changed since the trail had length mark"""
+        top = self.trail_length
+        while top > mark:
+            top -= 1
+            other = self.trail_session[top]
+            self.domains[other] = self.trail_domain[top]
+            self.pruned_by[other] = self.trail_pruned_by[top]
+        self.trail_length = mark
@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+from ..models import Room, TimeSlot, Course, Version
+
+# Version counter bumped by every write to the reference collections (rooms, time slots, courses)
+DATA_VERSION = 'data'
+
+# How long a lookup trusts the data version it last read before reading it again
+VERSION_CHECK_SECONDS = 5
+
+
+class ReferenceCache:
+    """Raw documents (as_pymongo) of the reference collections, shared by everything in the process
+
+    Rooms, time slots and courses change a few times a term but are read by every
+    run and every schedule view. A collection is fetched again only when the 'data'
+    Version counter has moved since it was cached. Lookups re-read the counter at
+    most every version_check_seconds, so a write made through another worker (see
+    invalidate()) is seen within that time; refresh() reads it at once, for callers
+    such as compile_problem that must not see stale data.
+
+    The cache holds at most max_documents documents, evicting the least recently
+    used collection first; a collection larger than that is read straight through.
+    Callers share the returned lists and dicts and must not modify them.
+    """
+
+    COLLECTIONS = (Room, TimeSlot, Course)
+
+    def __init__(self, max_documents=50000, version_check_seconds=VERSION_CHECK_SECONDS):
+        self.max_documents = max_documents
+        self.version_check_seconds = version_check_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # document class -> (data version, [raw documents])
+        self._size = 0
+        self._version = None  # Data version last read, at time.monotonic() _checked_at
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def rooms(self):
+        return self.get(Room)
+
+    def time_slots(self):
+        """Every time slot, breaks included"""
+        return self.get(TimeSlot)
+
+    def courses(self):
+        return self.get(Course)
+
+    def get(self, document):
+        """All documents of a reference collection, as of the data version last read"""
+        version = self._current_version()
+        with self._lock:
+            entry = self._entries.get(document)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(document)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        documents = list(document.objects.as_pymongo())
+        with self._lock:
+            self._drop(document)
+            if len(documents) <= self.max_documents:
+                self._entries[document] = (version, documents)
+                self._size += len(documents)
+                while self._size > self.max_documents:
+                    self._drop(next(iter(self._entries)))
+        return documents
+
+    def invalidate(self):
+        """Record a write to the scheduling data: bump the data version and drop this process's entries
+
+        Returns the new data version.
+        """
+        version = Version.bump(DATA_VERSION)
+        self.clear()
+        self._set_version(version)
+        return version
+
+    def refresh(self):
+        """Read the data version now, so the lookups that follow see every write made so far"""
+        version = Version.current(DATA_VERSION)
+        self._set_version(version)
+        return version
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _current_version(self):
+        with self._lock:
+            if self._version is not None and time.monotonic() - self._checked_at < self.version_check_seconds:
+                return self._version
+        return self.refresh()
+
+    def _set_version(self, version):
+        with self._lock:
+            self._version = version
+            self._checked_at = time.monotonic()
+
+    def _drop(self, document):
+        entry = self._entries.pop(document, None)
+        if entry is not None:
+            self._size -= len(entry[1])
+
+
+# The process-wide cache read by compile_problem, the schedule views and the routes
+reference_data = ReferenceCache()
@@ -0,0 +1,107 @@
+import json
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pymongo import monitoring
+
+
+class MongoCommandCounter(monitoring.CommandListener):
+    """Counts the commands (find, insert, delete, ...) every Mongo client in the process sends"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def started(self, event):
+        with self._lock:
+            self._counts[event.command_name] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def snapshot(self):
+        with self._lock:
+            return Counter(self._counts)
+
+
+# Registered with the connection in create_app(); runs count the commands issued while they last
+mongo_commands = MongoCommandCounter()
+
+
+class RunStats:
+    """What one scheduling run spent its time on: search counters, constraint checks, phases and Mongo traffic
+
+    Search engines report through add_search(): anything with nodes, backtracks,
+    max_depth and checks ({constraint: {'passed': n, 'failed': n}}) attributes, such
+    as ForwardCheckingSearch, CpSatSearch and the SearchCounters worker processes
+    send back. Mongo commands are counted from the
+    moment the object is created until finish(); other requests served at the same
+    time are counted too.
+    """
+
+    def __init__(self, on_phase=None):
+        self.on_phase = on_phase  # Called with each phase name as the run enters it
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.checks = {}  # constraint -> {'passed': n, 'failed': n}
+        self.phases = {}  # phase -> seconds, in the order the phases first ran
+        self.mongo_ops = {}  # command name -> count, filled in by finish()
+        self.warm_start = None  # {'reused': n, 'stored': n} placements, for warm-started runs
+        self.portfolio = None  # {'winner': worker index, 'config': its search settings}, for portfolio runs
+        self._mongo_start = mongo_commands.snapshot()
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block of work; a phase entered more than once adds up"""
+        if self.on_phase is not None:
+            self.on_phase(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def check(self, constraint, passed):
+        """Record one validity check of a hard constraint and hand its outcome back"""
+        counts = self.checks.setdefault(constraint, {'passed': 0, 'failed': 0})
+        counts['passed' if passed else 'failed'] += 1
+        return passed
+
+    def add_search(self, engine):
+        """Add the counters of a finished search engine"""
+        self.nodes += engine.nodes
+        self.backtracks += engine.backtracks
+        self.max_depth = max(self.max_depth, engine.max_depth)
+        for constraint, counts in engine.checks.items():
+            total = self.checks.setdefault(constraint, {'passed': 0, 'failed': 0})
+            total['passed'] += counts['passed']
+            total['failed'] += counts['failed']
+
+    def finish(self):
+        """Close the run: work out the Mongo commands it issued"""
+        self.mongo_ops = dict(mongo_commands.snapshot() - self._mongo_start)
+
+    def to_dict(self):
+        stats = {
+            'nodes': self.nodes,
+            'backtracks': self.backtracks,
+            'max_depth': self.max_depth,
+            'checks': self.checks,
+            'phases': {name: round(seconds, 4) for name, seconds in self.phases.items()},
+            'total_seconds': round(sum(self.phases.values()), 4),
+            'mongo_ops': self.mongo_ops,
+            'mongo_ops_total': sum(self.mongo_ops.values()),
+        }
+        if self.warm_start is not None:
+            stats['warm_start'] = self.warm_start
+        if self.portfolio is not None:
+            stats['portfolio'] = self.portfolio
+        return stats
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), separators=(',', ':'))